@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -33,6 +35,14 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
     'Пожалуйста зарегистрируйте приложение в `settings.INSTALLED_APPS`'
 )
 
+@pytest.fixture(autouse=True)
+def thumbnails_in_foreground(settings):
+    """Фоновые миниатюры не должны писать во временный MEDIA_ROOT после теста."""
+    settings.THUMBNAILS_IN_BACKGROUND = False
+    # Без обработчика очереди картинки обрабатываются в запросе.
+    settings.IMAGE_JOBS_ASYNC = False
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
@@ -0,0 +1,131 @@
+import threading
+
+import pytest
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from core.cache.backend import RedisCache
+from core.cache.server import FakeRedisServer
+
+
+@pytest.fixture(scope='module')
+def cache_server():
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def redis_cache(cache_server):
+    backend = RedisCache(cache_server.url, {
+        'OPTIONS': {'COMPRESS_MIN_LENGTH': 100},
+    })
+    backend.clear()
+    return backend
+
+
+class TestRedisCache:
+
+    def test_set_get_delete(self, redis_cache):
+        redis_cache.set('key', {'posts': [1, 2, 3]})
+        assert redis_cache.get('key') == {'posts': [1, 2, 3]}, (
+            'Проверьте, что кэш возвращает сохранённое значение'
+        )
+        redis_cache.delete('key')
+        assert redis_cache.get('key', 'default') == 'default'
+
+    def test_many_pipelined(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 'два', 'c': None}, DEFAULT_TIMEOUT)
+        assert redis_cache.get_many(['a', 'b', 'c', 'missing']) == {
+            'a': 1, 'b': 'два', 'c': None,
+        }
+        redis_cache.delete_many(['a', 'b'])
+        assert redis_cache.get_many(['a', 'b']) == {}
+
+    def test_compressed_values(self, redis_cache, cache_server):
+        text = 'пост ' * 1000
+        redis_cache.set('long', text)
+        stored = cache_server.store.get(0, redis_cache.make_key('long').encode())
+        assert stored.startswith(b'z') and len(stored) < len(text), (
+            'Проверьте, что крупные значения хранятся сжатыми'
+        )
+        assert redis_cache.get('long') == text
+
+    def test_incr_add_and_expiry(self, redis_cache):
+        with pytest.raises(ValueError):
+            redis_cache.incr('counter')
+        assert redis_cache.add('counter', 1)
+        assert not redis_cache.add('counter', 5)
+        assert redis_cache.incr('counter', 2) == 3
+        assert redis_cache.decr('counter') == 2
+        redis_cache.set('gone', 'value', timeout=0)
+        assert not redis_cache.has_key('gone')
+
+    def test_touch_without_timeout_persists(self, redis_cache, cache_server):
+        redis_cache.set('expiring', 'value', timeout=60)
+        assert redis_cache.touch('expiring', timeout=None)
+        key = redis_cache.make_key('expiring').encode()
+        assert cache_server.store.data[0][key][1] is None, (
+            'Проверьте, что touch с timeout=None снимает срок жизни ключа'
+        )
+        assert not redis_cache.touch('missing', timeout=None)
+
+    def test_pools_follow_options(self, cache_server):
+        small = RedisCache(cache_server.url, {
+            'OPTIONS': {'MAX_CONNECTIONS': 2},
+        })
+        large = RedisCache(cache_server.url, {
+            'OPTIONS': {'MAX_CONNECTIONS': 20},
+        })
+        same = RedisCache(cache_server.url, {
+            'OPTIONS': {'MAX_CONNECTIONS': 2},
+        })
+        assert small.pool is not large.pool, (
+            'Проверьте, что псевдонимы с разными OPTIONS не делят пул'
+        )
+        assert small.pool is same.pool
+
+    def test_incr_is_atomic(self, redis_cache):
+        redis_cache.set('shared', 0)
+
+        def bump():
+            for _ in range(50):
+                redis_cache.incr('shared')
+
+        threads = [threading.Thread(target=bump) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert redis_cache.get('shared') == 400, (
+            'Проверьте, что параллельные incr не теряют приращений'
+        )
+
+    def test_exec_aborts_when_watched_key_changes(self, redis_cache):
+        key = redis_cache.make_key('watched')
+        redis_cache.set('watched', 1)
+        with redis_cache.pool.session() as execute:
+            execute(('WATCH', key))
+            # Ключ удаляют между проверкой и EXEC.
+            redis_cache.delete('watched')
+            *_, replies = execute(('MULTI',), ('INCRBY', key, 1), ('EXEC',))
+        assert replies is None, (
+            'Проверьте, что EXEC отменяется, если ключ изменился после WATCH'
+        )
+        assert not redis_cache.has_key('watched'), (
+            'Проверьте, что incr не создаёт заново удалённый ключ'
+        )
+
+    def test_django_settings(self, cache_server, settings):
+        from django.core.cache import caches
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'core.cache.backend.RedisCache',
+                'LOCATION': cache_server.url,
+            }
+        }
+        shared = caches['default']
+        assert isinstance(shared, RedisCache), (
+            'Проверьте, что бэкенд кэша выбирается через настройки'
+        )
+        shared.set('from_settings', 'ok')
+        assert shared.get('from_settings') == 'ok'
@@ -0,0 +1,58 @@
+import json
+import logging
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+
+from core.instrumentation import fingerprint, stats
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.INSTRUMENTATION = True
+    settings.INSTRUMENTATION_INTERVAL = 3600
+    cache.clear()
+    stats.reset()
+    yield Client()
+    stats.reset()
+
+
+class TestInstrumentation:
+
+    def test_disabled_by_default(self, client, post):
+        response = client.get('/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без INSTRUMENTATION мидлварь не подключается'
+        )
+
+    def test_server_timing_header(self, instrumented, post):
+        response = instrumented.get('/')
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            assert metric in timing
+        assert 'desc="0 queries' not in timing
+
+    def test_cache_hits_counted(self, instrumented, post):
+        instrumented.get('/')
+        response = instrumented.get('/')
+        assert 'desc="0 hits' not in response['Server-Timing'], (
+            'Повторный запрос главной должен попадать в кэш фрагментов'
+        )
+
+    def test_aggregated_by_view_name(self, instrumented, post, caplog):
+        instrumented.get('/')
+        instrumented.get(f'/profile/{post.author.username}/')
+        snapshot = stats.snapshot()
+        assert snapshot['posts:index']['requests'] == 1
+        assert snapshot['posts:profile']['queries'] > 0
+        with caplog.at_level(logging.INFO, logger='core.instrumentation'):
+            stats.flush_due(0)
+        dumped = json.loads(caplog.records[-1].getMessage())
+        assert set(dumped) == {'posts:index', 'posts:profile'}
+        assert stats.snapshot() == {}
+
+
+def test_fingerprint_collapses_in_lists():
+    assert fingerprint('SELECT 1 WHERE id IN (%s, %s)') == fingerprint(
+        'SELECT 1  WHERE id IN (%s)')
@@ -0,0 +1,103 @@
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.replicas import (STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter,
+                           copy_sqlite, read_only)
+from posts.models import Post
+
+router = ReplicaRouter()
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica1']
+    settings.REPLICA_STICKY_SECONDS = 5
+
+
+def routed_view(request):
+    """Представление, которое запоминает, куда ушло чтение."""
+    reads = [router.db_for_read(Post)]
+    if request.method == 'POST':
+        router.db_for_write(Post)
+        reads.append(router.db_for_read(Post))
+    response = HttpResponse()
+    response.reads = reads
+    return response
+
+
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica_only_in_read_only_views(self, replicas):
+        assert router.db_for_read(Post) == 'default', (
+            'Проверьте, что вне read_only чтение идёт с основной базы'
+        )
+        response = read_only(routed_view)(RequestFactory().get('/'))
+        assert response.reads == ['replica1']
+        assert router.db_for_read(Post) == 'default'
+
+    def test_sessions_always_on_primary(self, replicas):
+        from django.contrib.sessions.models import Session
+
+        def view(request):
+            response = HttpResponse()
+            response.reads = [router.db_for_read(Session)]
+            return response
+
+        response = read_only(view)(RequestFactory().get('/'))
+        assert response.reads == ['default']
+
+    def test_write_switches_request_to_primary(self, replicas):
+        response = read_only(routed_view)(RequestFactory().post('/'))
+        assert response.reads == ['replica1', 'default'], (
+            'После записи запрос должен дочитывать с основной базы'
+        )
+
+    def test_no_replicas_configured(self):
+        response = read_only(routed_view)(RequestFactory().get('/'))
+        assert response.reads == ['default']
+
+    def test_write_pins_client_to_primary(self, replicas):
+        middleware = ReplicaMiddleware(read_only(routed_view))
+        response = middleware(RequestFactory().get('/'))
+        assert STICKY_COOKIE not in response.cookies, (
+            'Проверьте, что чтение не закрепляет клиента за основной базой'
+        )
+        response = middleware(RequestFactory().post('/'))
+        cookie = response.cookies[STICKY_COOKIE]
+        assert cookie['max-age'] == 5
+        request = RequestFactory().get('/')
+        request.COOKIES[STICKY_COOKIE] = cookie.value
+        assert middleware(request).reads == ['default']
+        request.COOKIES[STICKY_COOKIE] = str(time.time() - 1)
+        assert middleware(request).reads == ['replica1'], (
+            'После окна закрепления чтение возвращается на реплику'
+        )
+
+    def test_migrations_only_on_primary(self):
+        assert router.allow_migrate('default', 'posts')
+        assert not router.allow_migrate('replica1', 'posts')
+
+
+class TestReplicator:
+
+    def test_copy_sqlite(self, tmp_path):
+        source, target = tmp_path / 'db.sqlite3', tmp_path / 'replica.sqlite3'
+        with closing(sqlite3.connect(source)) as db:
+            db.execute('CREATE TABLE post (text TEXT)')
+            db.execute("INSERT INTO post VALUES ('Первый')")
+            db.commit()
+        copy_sqlite(str(source), str(target))
+        with closing(sqlite3.connect(target)) as db:
+            assert db.execute('SELECT text FROM post').fetchall() == [
+                ('Первый',)]
+
+    def test_command_requires_replicas(self, settings):
+        settings.DATABASE_REPLICAS = []
+        with pytest.raises(CommandError):
+            call_command('replicate_sqlite', once=True)
@@ -0,0 +1,69 @@
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from core.slow_queries import logger
+
+
+@pytest.fixture
+def slow_log(settings, caplog, monkeypatch):
+    settings.SLOW_QUERY_MS = 0
+    monkeypatch.setattr(logger, 'handlers', [caplog.handler])
+    return caplog
+
+
+class TestSlowQueries:
+
+    def test_queries_logged_with_plan(self, slow_log, post):
+        Client().get(f'/profile/{post.author.username}/')
+        entries = [json.loads(record.getMessage())
+                   for record in slow_log.records
+                   if record.name == 'core.slow_queries']
+        assert entries, 'При пороге 0 мс в журнал должен попасть каждый запрос'
+        profile = [entry for entry in entries
+                   if entry['view'] == 'posts:profile'
+                   and 'auth_user' in entry['fingerprint']]
+        assert profile and profile[0]['plan'], (
+            'Проверьте, что для SELECT сохраняется план запроса'
+        )
+        assert any('posts/views.py' in entry['caller'] for entry in profile)
+
+    def test_caller_skips_instrumentation(self, slow_log, settings, post):
+        settings.INSTRUMENTATION = True
+        Client().get(f'/profile/{post.author.username}/')
+        callers = [json.loads(record.getMessage())['caller']
+                   for record in slow_log.records
+                   if record.name == 'core.slow_queries']
+        assert callers, 'При пороге 0 мс в журнал должен попасть каждый запрос'
+        assert not [caller for caller in callers if caller and (
+            'core/instrumentation.py' in caller
+            or 'core/slow_queries.py' in caller)], (
+            'Кадры мидлварей замеров не должны попадать в caller'
+        )
+        assert any('posts/views.py' in caller
+                   for caller in callers if caller)
+
+    def test_disabled_by_default(self, client, post, caplog):
+        with caplog.at_level(logging.WARNING, logger='core.slow_queries'):
+            client.get('/')
+        assert not [record for record in caplog.records
+                    if record.name == 'core.slow_queries']
+
+    def test_summary_command(self, tmp_path, capsys):
+        path = tmp_path / 'slow.log'
+        entries = [
+            {'ms': 30.0, 'fingerprint': 'SELECT a', 'view': 'posts:index',
+             'caller': 'views.py:1', 'plan': ['SCAN posts_post']},
+            {'ms': 50.0, 'fingerprint': 'SELECT a', 'view': 'posts:profile',
+             'caller': 'views.py:2', 'plan': ['SCAN posts_follow']},
+            {'ms': 10.0, 'fingerprint': 'SELECT b', 'view': 'posts:index'},
+        ]
+        path.write_text('\n'.join(map(json.dumps, entries)) + '\nbroken\n')
+        call_command('slow_queries', file=str(path))
+        output = capsys.readouterr().out
+        assert output.index('SELECT a') < output.index('SELECT b')
+        assert '2 раз, всего 80.0 мс, максимум 50.0 мс' in output
+        assert 'SCAN posts_follow' in output
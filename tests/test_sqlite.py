@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+
+PRAGMAS = ('synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def file_connection(db, tmp_path):
+    wrapper = connection.copy()
+    wrapper.settings_dict['NAME'] = str(tmp_path / 'db.sqlite3')
+    yield wrapper
+    wrapper.close()
+
+
+class TestSqliteProfile:
+
+    def test_wal_and_pragmas_on_new_connection(self, settings,
+                                               file_connection):
+        assert pragma(file_connection, 'journal_mode') == 'wal', (
+            'Проверьте, что новое соединение SQLite переводится в режим WAL'
+        )
+        for name in PRAGMAS:
+            value = settings.SQLITE_PRAGMAS[name]
+            expected = 1 if value == 'normal' else value
+            assert pragma(file_connection, name) == expected, name
+
+    def test_defaults_without_profile(self, settings, file_connection):
+        settings.SQLITE_PRAGMAS = {}
+        assert pragma(file_connection, 'journal_mode') == 'delete'
+        assert pragma(file_connection, 'mmap_size') == 0
+
+    def test_persistent_connections(self, settings):
+        assert settings.DATABASES['default']['CONN_MAX_AGE'] > 0, (
+            'Проверьте, что соединения с базой переиспользуются'
+        )
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        """Подключение сигналов."""
+        from .sqlite import configure
+
+        connection_created.connect(configure,
+                                   dispatch_uid='core.sqlite.configure')
@@ -0,0 +1,254 @@
+"""Общий для всех процессов кэш поверх сервера с протоколом Redis."""
+import pickle
+import queue
+import socket
+import zlib
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .resp import encode_command, read_reply
+
+COMPRESSED = b'z'
+PICKLED = pickle.dumps(None)[:1]
+
+
+class ConnectionPool:
+    """Пул сокетов к одному серверу."""
+
+    def __init__(self, host, port, db=0, max_connections=10,
+                 socket_timeout=1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.socket_timeout = socket_timeout
+        self._idle = queue.LifoQueue(max_connections)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port),
+                                        self.socket_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile('rb'))
+        if self.db:
+            self._send(connection, [('SELECT', self.db)])
+        return connection
+
+    @staticmethod
+    def _send(connection, commands):
+        sock, stream = connection
+        sock.sendall(b''.join(encode_command(*args) for args in commands))
+        return [read_reply(stream) for _ in commands]
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            self._close(connection)
+
+    @contextmanager
+    def session(self):
+        """Одно соединение на несколько обменов подряд, например для WATCH.
+
+        Отдаёт функцию execute(*commands). При любой ошибке внутри блока
+        соединение закрывается, а не возвращается в пул.
+        """
+        connection, reused = self._acquire()
+
+        def execute(*commands):
+            nonlocal connection, reused
+            try:
+                replies = self._send(connection, commands)
+            except OSError:
+                if not reused:
+                    raise
+                # Соединение из пула могло устареть: пробуем новое.
+                self._close(connection)
+                connection, reused = self._connect(), False
+                replies = self._send(connection, commands)
+            reused = False
+            return replies
+
+        try:
+            yield execute
+        except BaseException:
+            self._close(connection)
+            raise
+        self._release(connection)
+
+    def execute(self, *commands):
+        """Отправляет команды одним пакетом и читает все ответы."""
+        with self.session() as execute:
+            return execute(*commands)
+
+    @staticmethod
+    def _close(connection):
+        sock, stream = connection
+        stream.close()
+        sock.close()
+
+    def disconnect(self):
+        """Закрывает все свободные соединения."""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pools = {}
+
+
+class RedisCache(BaseCache):
+    """Бэкенд кэша Django для серверов с протоколом Redis.
+
+    Пулы соединений общие для потоков процесса, get_many/set_many идут
+    одним конвейером, крупные значения сжимаются zlib.
+    Параметры OPTIONS: MAX_CONNECTIONS, SOCKET_TIMEOUT, COMPRESS_MIN_LENGTH.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        url = urlparse(server if '://' in server else f'redis://{server}')
+        options = params.get('OPTIONS', {})
+        self.compress_min_length = options.get('COMPRESS_MIN_LENGTH', 1024)
+        db = int(url.path.strip('/') or 0)
+        address = (url.hostname, url.port or 6379, db)
+        pool_options = {
+            'max_connections': options.get('MAX_CONNECTIONS', 10),
+            'socket_timeout': options.get('SOCKET_TIMEOUT', 1.0),
+        }
+        # Псевдонимы с разными OPTIONS не должны делить один пул.
+        key = (*address, *sorted(pool_options.items()))
+        if key not in _pools:
+            _pools[key] = ConnectionPool(*address, **pool_options)
+        self.pool = _pools[key]
+
+    def _encode(self, value):
+        # Целые храним как есть, чтобы работал INCRBY.
+        if type(value) is int:
+            return str(value).encode()
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) >= self.compress_min_length:
+            return COMPRESSED + zlib.compress(data)
+        return data
+
+    @staticmethod
+    def _decode(data):
+        if data is None:
+            return None
+        if data[:1] == COMPRESSED:
+            return pickle.loads(zlib.decompress(data[1:]))
+        if data[:1] == PICKLED:
+            return pickle.loads(data)
+        return int(data)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl(self, timeout):
+        """Срок жизни в миллисекундах, None — бессрочно."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else int(timeout * 1000)
+
+    def _set_command(self, key, value, timeout, *flags):
+        timeout = self._ttl(timeout)
+        if timeout is not None and timeout <= 0:
+            # Нулевой или отрицательный срок: значение сразу устаревает.
+            return ('DEL', key)
+        command = ['SET', key, self._encode(value)]
+        if timeout is not None:
+            command += ['PX', timeout]
+        return (*command, *flags)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        reply, = self.pool.execute(
+            self._set_command(key, value, timeout, 'NX'))
+        return reply is not None
+
+    def get(self, key, default=None, version=None):
+        reply, = self.pool.execute(('GET', self._key(key, version)))
+        return default if reply is None else self._decode(reply)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.pool.execute(
+            self._set_command(self._key(key, version), value, timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        timeout = self._ttl(timeout)
+        if timeout is None:
+            # Бессрочно: снимаем срок жизни, если он был.
+            _, exists = self.pool.execute(('PERSIST', key), ('EXISTS', key))
+            return bool(exists)
+        reply, = self.pool.execute(('PEXPIRE', key, max(timeout, 1)))
+        return bool(reply)
+
+    def delete(self, key, version=None):
+        self.pool.execute(('DEL', self._key(key, version)))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        names = [self._key(key, version) for key in keys]
+        replies, = self.pool.execute(('MGET', *names))
+        return {key: self._decode(reply)
+                for key, reply in zip(keys, replies) if reply is not None}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self.pool.execute(*(
+                self._set_command(self._key(key, version), value, timeout)
+                for key, value in data.items()
+            ))
+        return []
+
+    def delete_many(self, keys, version=None):
+        names = [self._key(key, version) for key in keys]
+        if names:
+            self.pool.execute(('DEL', *names))
+
+    def has_key(self, key, version=None):
+        reply, = self.pool.execute(('EXISTS', self._key(key, version)))
+        return bool(reply)
+
+    def incr(self, key, delta=1, version=None):
+        """INCRBY только существующего ключа, атомарно через WATCH/MULTI.
+
+        Если ключ изменился или истёк между проверкой и EXEC, транзакция
+        отменяется и проверка повторяется.
+        """
+        key = self._key(key, version)
+        value = None
+        with self.pool.session() as execute:
+            while True:
+                _, exists = execute(('WATCH', key), ('EXISTS', key))
+                if not exists:
+                    execute(('UNWATCH',))
+                    break
+                *_, replies = execute(('MULTI',), ('INCRBY', key, delta),
+                                      ('EXEC',))
+                if replies is not None:
+                    value, = replies
+                    break
+        if value is None:
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def clear(self):
+        self.pool.execute(('FLUSHDB',))
+
+    def close(self, **kwargs):
+        # Соединения переживают запрос и возвращаются в пул.
+        pass
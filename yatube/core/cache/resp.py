@@ -0,0 +1,69 @@
+"""Кодирование и разбор протокола RESP (Redis Serialization Protocol)."""
+
+
+class RespError(Exception):
+    """Ошибка, которую вернул сервер."""
+
+
+class Status(bytes):
+    """Строка статуса сервера, например QUEUED."""
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def encode_command(*args):
+    """Команда в виде массива bulk-строк."""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        arg = _to_bytes(arg)
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def encode_reply(value):
+    """Ответ сервера для значения Python."""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, RespError):
+        return b'-%s\r\n' % _to_bytes(value)
+    if isinstance(value, Status):
+        return b'+%s\r\n' % value
+    if isinstance(value, bool):
+        return b'+OK\r\n' if value else b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, (list, tuple)):
+        return b'*%d\r\n' % len(value) + b''.join(
+            encode_reply(item) for item in value)
+    value = _to_bytes(value)
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def read_reply(stream):
+    """Читает один ответ из файлового объекта сокета."""
+    line = stream.readline()
+    if not line:
+        raise ConnectionError('Соединение закрыто сервером')
+    kind, payload = line[:1], line[1:-2]
+    if kind == b'+':
+        return payload
+    if kind == b'-':
+        raise RespError(payload.decode())
+    if kind == b':':
+        return int(payload)
+    if kind == b'$':
+        length = int(payload)
+        if length == -1:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if kind == b'*':
+        length = int(payload)
+        if length == -1:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise RespError(f'Неизвестный тип ответа: {line!r}')
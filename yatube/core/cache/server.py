@@ -0,0 +1,222 @@
+"""Встроенный сервер с протоколом Redis для тестов и локальной разработки.
+
+Поддерживает только команды, которые нужны бэкенду кэша.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+from .resp import RespError, Status, encode_reply, read_reply
+
+
+class _Store:
+    """Словари баз данных со сроками жизни ключей."""
+
+    def __init__(self, databases=16):
+        self.lock = threading.Lock()
+        self.data = [{} for _ in range(databases)]
+
+    def get(self, db, key):
+        item = self.data[db].get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self.data[db][key]
+            return None
+        return value
+
+    def set(self, db, key, value, ttl_ms=None):
+        expires = None
+        if ttl_ms is not None:
+            expires = time.monotonic() + ttl_ms / 1000
+        self.data[db][key] = (value, expires)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Обработка команд одного соединения."""
+
+    # Команды, которые внутри MULTI выполняются сразу, а не в очередь.
+    IMMEDIATE = ('EXEC', 'DISCARD', 'MULTI', 'WATCH', 'QUIT')
+
+    def setup(self):
+        super().setup()
+        # Ответы конвейера идут мелкими записями: без Nagle и задержек ACK.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.db = 0
+        self.watched = {}
+        self.queued = None
+
+    def handle(self):
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not command:
+                return
+            name = command[0].decode().upper()
+            try:
+                reply = self.dispatch(name, command[1:])
+            except RespError as error:
+                reply = error
+            except (ValueError, IndexError):
+                reply = RespError('ERR syntax error')
+            self.wfile.write(encode_reply(reply))
+            if name == 'QUIT':
+                return
+
+    def dispatch(self, name, args):
+        """Выполняет команду или ставит её в очередь MULTI."""
+        handler = getattr(self, f'cmd_{name.lower()}', None)
+        if handler is None:
+            raise RespError(f"ERR unknown command '{name}'")
+        if self.queued is not None and name not in self.IMMEDIATE:
+            self.queued.append((handler, args))
+            return Status(b'QUEUED')
+        store = self.server.store
+        with store.lock:
+            return handler(store, *args)
+
+    def cmd_ping(self, store, *args):
+        return args[0] if args else b'PONG'
+
+    def cmd_quit(self, store):
+        return True
+
+    def cmd_select(self, store, db):
+        db = int(db)
+        if not 0 <= db < len(store.data):
+            raise RespError('ERR DB index is out of range')
+        self.db = db
+        return True
+
+    def cmd_get(self, store, key):
+        return store.get(self.db, key)
+
+    def cmd_mget(self, store, *keys):
+        return [store.get(self.db, key) for key in keys]
+
+    def cmd_set(self, store, key, value, *options):
+        options = [option.upper() for option in options]
+        ttl_ms = None
+        if b'PX' in options:
+            ttl_ms = int(options[options.index(b'PX') + 1])
+        elif b'EX' in options:
+            ttl_ms = int(options[options.index(b'EX') + 1]) * 1000
+        exists = store.get(self.db, key) is not None
+        if b'NX' in options and exists or b'XX' in options and not exists:
+            return None
+        store.set(self.db, key, value, ttl_ms)
+        return True
+
+    def cmd_del(self, store, *keys):
+        deleted = 0
+        for key in keys:
+            if store.get(self.db, key) is not None:
+                del store.data[self.db][key]
+                deleted += 1
+        return deleted
+
+    def cmd_exists(self, store, *keys):
+        return sum(store.get(self.db, key) is not None for key in keys)
+
+    def cmd_incrby(self, store, key, amount):
+        value = store.get(self.db, key)
+        try:
+            value = int(value or 0) + int(amount)
+        except ValueError:
+            raise RespError('ERR value is not an integer or out of range')
+        _, expires = store.data[self.db].get(key, (None, None))
+        store.data[self.db][key] = (str(value).encode(), expires)
+        return value
+
+    def cmd_pexpire(self, store, key, ttl_ms):
+        value = store.get(self.db, key)
+        if value is None:
+            return 0
+        store.set(self.db, key, value, int(ttl_ms))
+        return 1
+
+    def cmd_persist(self, store, key):
+        value = store.get(self.db, key)
+        if value is None or store.data[self.db][key][1] is None:
+            return 0
+        store.set(self.db, key, value)
+        return 1
+
+    def cmd_watch(self, store, *keys):
+        for key in keys:
+            store.get(self.db, key)
+            # Запись ключа заменяет кортеж, так изменение и видно.
+            self.watched[self.db, key] = store.data[self.db].get(key)
+        return True
+
+    def cmd_unwatch(self, store):
+        self.watched = {}
+        return True
+
+    def cmd_multi(self, store):
+        if self.queued is not None:
+            raise RespError('ERR MULTI calls can not be nested')
+        self.queued = []
+        return True
+
+    def cmd_discard(self, store):
+        if self.queued is None:
+            raise RespError('ERR DISCARD without MULTI')
+        self.queued, self.watched = None, {}
+        return True
+
+    def cmd_exec(self, store):
+        if self.queued is None:
+            raise RespError('ERR EXEC without MULTI')
+        queued, self.queued = self.queued, None
+        watched, self.watched = self.watched, {}
+        for (db, key), item in watched.items():
+            store.get(db, key)
+            if store.data[db].get(key) is not item:
+                return None
+        replies = []
+        for handler, args in queued:
+            try:
+                replies.append(handler(store, *args))
+            except RespError as error:
+                replies.append(error)
+            except (ValueError, IndexError):
+                replies.append(RespError('ERR syntax error'))
+        return replies
+
+    def cmd_flushdb(self, store):
+        store.data[self.db].clear()
+        return True
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """Многопоточный TCP-сервер, хранящий данные в памяти процесса."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self.store = _Store()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер и закрывает сокет."""
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,218 @@
+"""Замеры запросов: SQL, рендер шаблонов и кэш.
+
+Включается настройкой INSTRUMENTATION. Выключенная, мидлварь
+отказывается от подключения через MiddlewareNotUsed и ничего не стоит.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+_current = ContextVar('instrumentation_recorder', default=None)
+_MISSING = object()
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL без различий в длине списков IN и пробелах."""
+    return _IN_LIST.sub('IN (...)', _SPACES.sub(' ', sql).strip())
+
+
+class Recorder:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return {sql: count for sql, count in self.queries.items()
+                if count > 1}
+
+    def metrics(self):
+        return {
+            'total_ms': (time.perf_counter() - self.started) * 1000,
+            'queries': sum(self.queries.values()),
+            'sql_ms': self.sql_time * 1000,
+            'duplicates': sum(self.duplicates.values()),
+            'render_ms': self.render_time * 1000,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def server_timing(metrics):
+    """Значение заголовка Server-Timing."""
+    return ', '.join((
+        f'db;dur={metrics["sql_ms"]:.1f};desc="{metrics["queries"]} '
+        f'queries, {metrics["duplicates"]} duplicate"',
+        f'tpl;dur={metrics["render_ms"]:.1f}',
+        f'cache;desc="{metrics["cache_hits"]} hits, '
+        f'{metrics["cache_misses"]} misses"',
+        f'total;dur={metrics["total_ms"]:.1f}',
+    ))
+
+
+class Stats:
+    """Сводка метрик по именам представлений между выгрузками."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(Counter)
+        self._duplicates = defaultdict(Counter)
+        self._since = time.monotonic()
+
+    def add(self, view_name, metrics, duplicates):
+        with self._lock:
+            totals = self._views[view_name]
+            totals['requests'] += 1
+            totals.update(metrics)
+            self._duplicates[view_name].update(duplicates)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    'requests': totals['requests'],
+                    **{key: round(value / totals['requests'], 2)
+                       for key, value in totals.items()
+                       if key != 'requests'},
+                    'top_duplicates': [
+                        sql for sql, _ in
+                        self._duplicates[name].most_common(3)],
+                }
+                for name, totals in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._duplicates.clear()
+            self._since = time.monotonic()
+
+    def flush_due(self, interval):
+        """Выгружает сводку в лог, если прошло interval секунд."""
+        if time.monotonic() - self._since < interval:
+            return
+        snapshot = self.snapshot()
+        self.reset()
+        if snapshot:
+            logger.info(json.dumps(snapshot, ensure_ascii=False))
+
+
+stats = Stats()
+
+
+def _patch_render():
+    original = Template.render
+
+    def render(self, *args, **kwargs):
+        recorder = _current.get()
+        if recorder is None:
+            return original(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            recorder.render_time += time.perf_counter() - started
+
+    Template.render = render
+
+
+def _patch_cache(backend):
+    original_get, original_get_many = backend.get, backend.get_many
+
+    def get(self, key, default=None, version=None):
+        value = original_get(self, key, _MISSING, version)
+        recorder = _current.get()
+        if recorder is not None:
+            if value is _MISSING:
+                recorder.cache_misses += 1
+            else:
+                recorder.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = original_get_many(self, keys, version)
+        recorder = _current.get()
+        if recorder is not None:
+            recorder.cache_hits += len(values)
+            recorder.cache_misses += len(keys) - len(values)
+        return values
+
+    backend.get, backend.get_many = get, get_many
+
+
+_patched = set()
+
+
+def install():
+    """Подменяет рендер шаблонов и чтение кэшей один раз на процесс."""
+    if 'render' not in _patched:
+        _patch_render()
+        _patched.add('render')
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if backend not in _patched:
+            _patch_cache(backend)
+            _patched.add(backend)
+
+
+class InstrumentationMiddleware:
+    """Метрики запроса в Server-Timing и периодическую сводку."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.interval = getattr(settings, 'INSTRUMENTATION_INTERVAL', 60)
+
+    def __call__(self, request):
+        recorder = Recorder()
+        token = _current.set(recorder)
+        try:
+            with self.wrap_databases(recorder):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        metrics = recorder.metrics()
+        response['Server-Timing'] = server_timing(metrics)
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        stats.add(view_name, metrics, recorder.duplicates)
+        stats.flush_due(self.interval)
+        return response
+
+    @staticmethod
+    def wrap_databases(recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
@@ -0,0 +1,10 @@
+import os
+from logging import handlers
+
+
+class RotatingFileHandler(handlers.RotatingFileHandler):
+    """Ротируемый файл, каталог для которого создаётся при первой записи."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
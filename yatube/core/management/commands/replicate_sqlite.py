@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.replicas import copy_sqlite
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики из DATABASE_REPLICAS '
+            'с заданным интервалом — замена настоящей репликации для '
+            'локальной проверки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза между копиями, с.')
+        parser.add_argument('--once', action='store_true',
+                            help='Скопировать один раз и выйти.')
+
+    def handle(self, *args, **options):
+        databases = [settings.DATABASES[alias] for alias in
+                     [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]]
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте '
+                               'REPLICA_DATABASES.')
+        if any(database['ENGINE'] != SQLITE for database in databases):
+            raise CommandError('Команда работает только с SQLite.')
+        source, *targets = [database['NAME'] for database in databases]
+        while True:
+            for target in targets:
+                copy_sqlite(source, target)
+            self.stdout.write(f'Реплик обновлено: {len(targets)}')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.cache.server import FakeRedisServer
+
+
+class Command(BaseCommand):
+    help = ('Запускает локальный сервер кэша с протоколом Redis '
+            'для разработки без установленного Redis.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=6379)
+
+    def handle(self, *args, **options):
+        server = FakeRedisServer(options['host'], options['port'])
+        self.stdout.write(f'Сервер кэша запущен: {server.url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
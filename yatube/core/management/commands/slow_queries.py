@@ -0,0 +1,59 @@
+import glob
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_entries(path):
+    """Строки журнала вместе с ротированными файлами, битые пропускаются."""
+    for name in sorted(glob.glob(f'{glob.escape(path)}*'), reverse=True):
+        with open(name, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries):
+    """Группирует записи по отпечатку запроса."""
+    groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0,
+                                  'max_ms': 0.0, 'views': set()})
+    for entry in entries:
+        group = groups[entry['fingerprint']]
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        if entry['ms'] >= group['max_ms']:
+            group['max_ms'] = entry['ms']
+            group['caller'] = entry.get('caller')
+            group['plan'] = entry.get('plan')
+        if entry.get('view'):
+            group['views'].add(entry['view'])
+    return sorted(groups.items(), key=lambda item: -item[1]['total_ms'])
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных запросов: отпечатки по суммарному '
+            'времени, представления, место вызова и план.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not glob.glob(f'{glob.escape(options["file"])}*'):
+            raise CommandError(f'Журнал {options["file"]} не найден')
+        summary = summarize(read_entries(options['file']))
+        for sql, group in summary[:options['top']]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{group["count"]} раз, всего {group["total_ms"]:.1f} мс, '
+                f'максимум {group["max_ms"]:.1f} мс'))
+            self.stdout.write(f'    {sql}')
+            self.stdout.write(
+                f'    представления: {", ".join(sorted(group["views"]))}')
+            if group.get('caller'):
+                self.stdout.write(f'    вызов: {group["caller"]}')
+            for line in group.get('plan') or ():
+                self.stdout.write(f'    план: {line}')
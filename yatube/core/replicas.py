@@ -0,0 +1,104 @@
+"""Чтение с реплик базы.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Представления,
+помеченные read_only, читают с одной случайной реплики на весь запрос;
+остальное, включая сессии, идёт в основную базу. После записи клиент
+получает cookie STICKY_COOKIE и REPLICA_STICKY_SECONDS читает только
+с основной базы, чтобы видеть свои изменения, пока реплики догоняют.
+"""
+import random
+import sqlite3
+import time
+from contextlib import closing
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'primary_until'
+PRIMARY_APPS = {'sessions'}
+
+_replica = ContextVar('replica', default=None)
+_writes = ContextVar('writes', default=None)
+
+
+def aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pinned(request):
+    """Клиент недавно писал и ещё не должен читать с реплик."""
+    try:
+        return float(request.COOKIES[STICKY_COOKIE]) > time.time()
+    except (KeyError, ValueError):
+        return False
+
+
+def read_only(view):
+    """Читает данные представления с реплики, если клиент не закреплён."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if not aliases() or pinned(request):
+            return view(request, *args, **kwargs)
+        token = _replica.set(random.choice(aliases()))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _replica.reset(token)
+    return wrapped
+
+
+class ReplicaRouter:
+    """Чтение внутри read_only — с реплики, всё остальное — с основной."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # После записи в том же запросе реплика может её ещё не видеть.
+        _replica.set(None)
+        writes = _writes.get()
+        if writes is not None:
+            writes.append(model._meta.label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает на реплики вместе с данными.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """Закрепляет клиента за основной базой после записи."""
+
+    def __init__(self, get_response):
+        if not aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.window = settings.REPLICA_STICKY_SECONDS
+
+    def __call__(self, request):
+        token = _writes.set([])
+        try:
+            response = self.get_response(request)
+            wrote = _writes.get()
+        finally:
+            _writes.reset(token)
+        if wrote:
+            response.set_cookie(STICKY_COOKIE, str(time.time() + self.window),
+                                max_age=self.window, httponly=True,
+                                samesite='Lax')
+        return response
+
+
+def copy_sqlite(source, target):
+    """Переносит снимок базы source в target через backup API SQLite."""
+    with closing(sqlite3.connect(source)) as origin, \
+            closing(sqlite3.connect(target)) as replica:
+        origin.backup(replica)
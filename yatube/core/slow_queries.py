@@ -0,0 +1,100 @@
+"""Журнал медленных запросов с планом выполнения.
+
+Включается настройкой SLOW_QUERY_MS. Каждый запрос к базе дольше
+порога пишется JSON-строкой в логгер core.slow_queries, который
+в settings.LOGGING направлен в ротируемый файл SLOW_QUERY_LOG.
+"""
+import json
+import logging
+import time
+import traceback
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+from . import instrumentation
+
+logger = logging.getLogger(__name__)
+# Обёртки и мидлвари замеров есть в стеке каждого запроса, они не caller.
+SKIP_MODULES = (__file__, instrumentation.__file__)
+
+
+def explain(connection, sql, params):
+    """План запроса: EXPLAIN QUERY PLAN для SQLite, EXPLAIN для прочих."""
+    prefix = ('EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite'
+              else 'EXPLAIN')
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except DatabaseError as error:
+        return [f'EXPLAIN не удался: {error}']
+
+
+def caller():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if (frame.filename.startswith(settings.BASE_DIR)
+                and frame.filename not in SKIP_MODULES
+                and '-packages' not in frame.filename):
+            return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class SlowQueryWrapper:
+    """Обёртка execute, отмечающая запросы дольше порога."""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold_ms = threshold_ms
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= self.threshold_ms:
+                self.record(sql, params, many, context['connection'],
+                            duration)
+
+    def record(self, sql, params, many, connection, duration):
+        match = self.request.resolver_match
+        entry = {
+            'time': time.time(),
+            'ms': round(duration, 3),
+            'fingerprint': instrumentation.fingerprint(sql),
+            'view': match.view_name if match else None,
+            'path': self.request.path,
+            'caller': caller(),
+            'plan': None,
+        }
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            self.explaining = True
+            try:
+                entry['plan'] = explain(connection, sql, params)
+            finally:
+                self.explaining = False
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+class SlowQueryMiddleware:
+    """Подключает SlowQueryWrapper ко всем базам на время запроса."""
+
+    def __init__(self, get_response):
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_MS', None)
+        if self.threshold_ms is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrapper = SlowQueryWrapper(request, self.threshold_ms)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return self.get_response(request)
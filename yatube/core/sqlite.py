@@ -0,0 +1,20 @@
+"""Настройка соединений SQLite.
+
+При открытии каждого соединения выполняются PRAGMA из
+settings.SQLITE_PRAGMAS: WAL разрешает читать во время записи,
+busy_timeout заставляет писателя ждать блокировку, а не падать
+с `database is locked`.
+"""
+from django.conf import settings
+
+
+def configure(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
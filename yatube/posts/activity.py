@@ -0,0 +1,66 @@
+"""Число комментариев и время последней активности поста.
+
+Поля Post.comment_count и Post.last_activity сдвигаются одним UPDATE
+с F() при добавлении (сигнал) и удалении (Comment.delete) комментария,
+так что списки не считают COUNT по комментариям. Каскад при удалении
+поста их не трогает. После массовой вставки их пересчитывает refresh()
+для затронутых постов или repair() для всей таблицы.
+"""
+from django.db import transaction
+from django.db.models import (Count, DateTimeField, F, IntegerField, Max,
+                              OuterRef, Subquery, Value)
+from django.db.models.functions import Coalesce, Greatest
+
+from .bulk import BATCH_SIZE, batches
+from .models import Comment, Post
+
+
+def comment_added(comment):
+    """Новый комментарий: +1 и дата активности не раньше комментария."""
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_activity=Greatest(F('last_activity'),
+                               Value(comment.created, DateTimeField())))
+
+
+def comment_removed(comment):
+    """Удалённый комментарий: -1 и дата по оставшимся комментариям."""
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_activity=_actual_activity())
+
+
+def _actual_count():
+    rows = (Comment.objects.filter(post=OuterRef('pk')).order_by()
+            .values('post').annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _actual_activity():
+    rows = (Comment.objects.filter(post=OuterRef('pk')).order_by()
+            .values('post').annotate(newest=Max('created'))
+            .values('newest'))
+    return Greatest(F('pub_date'), Coalesce(Subquery(rows), F('pub_date')))
+
+
+def refresh(post_ids):
+    """Пересчитывает поля у заданных постов, возвращает их число."""
+    return Post.objects.filter(pk__in=post_ids).update(
+        comment_count=_actual_count(),
+        last_activity=_actual_activity())
+
+
+@transaction.atomic
+def repair(batch_size=BATCH_SIZE):
+    """Пересчитывает поля у разошедшихся постов, возвращает их число."""
+    drifted = Post.objects.annotate(
+        actual_count=_actual_count(),
+        actual_activity=_actual_activity(),
+    ).exclude(
+        comment_count=F('actual_count'),
+        last_activity=F('actual_activity'),
+    ).values_list('pk', flat=True).order_by()
+    fixed = 0
+    for pks in batches(list(drifted), batch_size):
+        fixed += refresh(pks)
+    return fixed
@@ -1,20 +1,53 @@
 from django.contrib import admin
 
+from . import fragments, search
 from .models import Post, Group, Follow
 
 
 class PostAdmin(admin.ModelAdmin):
     # Перечисляем поля, которые должны отображаться в админке.
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group',
+                    'comment_count',)
     list_editable = ('group',)
-    # Добавляем интерфейс для поиска по тексту постов.
+    # Строка поиска; ищет полнотекстовый индекс, см. get_search_results.
     search_fields = ('text',)
     # Добавляем возможность фильтрации по дате.
     list_filter = ('pub_date',)
     # Это свойство сработает для всех колонок.
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск через полнотекстовый индекс вместо LIKE '%term%'."""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search.search(search_term)), False
+
+    def save_model(self, request, obj, form, change):
+        """Правка из админки сбрасывает кэш страниц с постом."""
+        super().save_model(request, obj, form, change)
+        fragments.invalidate_post(obj, getattr(obj, '_old_group_id', None))
+
+    def delete_model(self, request, obj):
+        fragments.invalidate_post(obj)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for post in queryset.select_related('author'):
+            fragments.invalidate_post(post)
+        super().delete_queryset(request, queryset)
+
+
+class GroupAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        """Новое название группы видно на всех её страницах."""
+        super().save_model(request, obj, form, change)
+        fragments.invalidate_group(obj)
+
+    def delete_model(self, request, obj):
+        fragments.invalidate_group(obj)
+        super().delete_model(request, obj)
+
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Follow)
@@ -0,0 +1,265 @@
+"""JSON API только для чтения, версия 1.
+
+Строки берутся через .values() из тех же выборок, что и страницы,
+модели не создаются. Параметры списков:
+  fields=id,text — вывести только эти поля;
+  expand=author,group — вложить автора и группу объектами;
+  cursor, limit — курсор по (pub_date, id), как у страниц; группы
+    листаются по названию, подписки — по порядку подписки.
+"""
+import json
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from core import replicas
+
+from . import feed
+from .models import Comment, Follow, Group, Post, User
+from .paginator import CursorPaginator
+
+API_VERSION = 'v1'
+LIMIT = 10
+MAX_LIMIT = 100
+
+# Поле ответа -> путь для .values().
+POST = {
+    'id': 'id', 'text': 'text', 'pub_date': 'pub_date', 'image': 'image',
+    'author': 'author__username', 'group': 'group__slug',
+}
+COMMENT = {
+    'id': 'id', 'text': 'text', 'created': 'created', 'post': 'post_id',
+    'author': 'author__username',
+}
+GROUP = {
+    'id': 'id', 'slug': 'slug', 'title': 'title',
+    'description': 'description',
+}
+FOLLOW = {'author': 'author__username'}
+EMBEDS = {
+    'author': {'username': 'author__username',
+               'first_name': 'author__first_name',
+               'last_name': 'author__last_name'},
+    'group': {'slug': 'group__slug', 'title': 'group__title'},
+}
+FORMATTERS = {
+    'image': lambda name: default_storage.url(name) if name else None,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def endpoint(view):
+    """GET-представление API: чтение с реплик, ошибки в JSON."""
+    @replicas.read_only
+    @require_safe
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'error': error.message},
+                                status=error.status,
+                                json_dumps_params={'ensure_ascii': False})
+    return wrapped
+
+
+def _names(value):
+    return [name for name in (value or '').split(',') if name]
+
+
+def columns(request, resource):
+    """Поля ответа и колонки для .values() по fields и expand."""
+    names = _names(request.GET.get('fields')) or list(resource)
+    expand = _names(request.GET.get('expand'))
+    unknown = [name for name in names if name not in resource]
+    unknown += [name for name in expand
+                if name not in EMBEDS or name not in resource]
+    if unknown:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(unknown)}')
+    names += [name for name in expand if name not in names]
+    mapping = {}
+    for name in names:
+        if name in expand:
+            for inner, path in EMBEDS[name].items():
+                mapping[name, inner] = path
+        else:
+            mapping[name] = resource[name]
+    return mapping
+
+
+def shape(row, mapping):
+    """Строка .values() в объект ответа."""
+    item = {}
+    for name, path in mapping.items():
+        if isinstance(name, tuple):
+            item.setdefault(name[0], {})[name[1]] = row[path]
+        elif name in FORMATTERS:
+            item[name] = FORMATTERS[name](row[path])
+        else:
+            item[name] = row[path]
+    for name, value in item.items():
+        # Пустая связь (пост без группы) вкладывается как null.
+        if isinstance(value, dict) and not any(value.values()):
+            item[name] = None
+    return item
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', LIMIT))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _stream(items, links):
+    yield '{"data": ['
+    for number, item in enumerate(items):
+        yield (',' if number else '') + _dumps(item)
+    yield '], "links": ' + _dumps(links) + '}'
+
+
+def stream(request, items, page=None):
+    """Список ответом-потоком.
+
+    Запросы к базе должны быть выполнены до возврата: генератор
+    дочитывается уже после выхода из read_only.
+    """
+    links = {
+        'next': _link(request, page.next_cursor),
+        'previous': _link(request, page.previous_cursor),
+    } if page is not None else {}
+    return StreamingHttpResponse(_stream(items, links),
+                                 content_type='application/json')
+
+
+def _values(queryset, mapping, *required):
+    return queryset.values(*dict.fromkeys([*mapping.values(), *required]))
+
+
+def cursor_page(request, queryset, mapping, date_field='pub_date',
+                id_field='id', ascending=False, **options):
+    """Страница строк по курсору; ключевые поля выбираются всегда."""
+    paginator = CursorPaginator(
+        _values(queryset, mapping, date_field, id_field), _limit(request),
+        date_field=date_field, id_field=id_field, ascending=ascending,
+        **options)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def post_list(request, queryset):
+    mapping = columns(request, POST)
+    page = cursor_page(request, queryset, mapping)
+    return stream(request, (shape(row, mapping) for row in page), page)
+
+
+def _pk_or_404(queryset, message, **lookup):
+    pk = queryset.filter(**lookup).values_list('pk', flat=True).first()
+    if pk is None:
+        raise ApiError(404, message)
+    return pk
+
+
+def _require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужна авторизация')
+
+
+@endpoint
+def posts(request):
+    """Все посты, как на главной."""
+    return post_list(request, Post.objects.for_display())
+
+
+@endpoint
+def group_posts(request, slug):
+    """Посты группы."""
+    group_id = _pk_or_404(Group.objects, 'Группа не найдена', slug=slug)
+    return post_list(request,
+                     Post.objects.for_display().filter(group_id=group_id))
+
+
+@endpoint
+def profile_posts(request, username):
+    """Посты автора."""
+    author_id = _pk_or_404(User.objects, 'Автор не найден',
+                           username=username)
+    return post_list(request,
+                     Post.objects.for_display().filter(author_id=author_id))
+
+
+@endpoint
+def follow_posts(request):
+    """Лента подписок текущего пользователя."""
+    _require_user(request)
+    mapping = columns(request, POST)
+    page = cursor_page(request, feed.feed_for(request.user), {},
+                       id_field='post_id')
+    post_ids = [entry['post_id'] for entry in page]
+    rows = {row['id']: row for row in _values(
+        Post.objects.for_display().filter(pk__in=post_ids), mapping, 'id')}
+    return stream(request, (shape(rows[pk], mapping)
+                            for pk in post_ids if pk in rows), page)
+
+
+@endpoint
+def post_detail(request, post_id):
+    """Один пост."""
+    mapping = columns(request, POST)
+    row = _values(Post.objects.for_display().filter(pk=post_id),
+                  mapping).first()
+    if row is None:
+        raise ApiError(404, 'Пост не найден')
+    return JsonResponse({'data': shape(row, mapping)},
+                        encoder=DjangoJSONEncoder,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@endpoint
+def post_comments(request, post_id):
+    """Комментарии поста от старых к новым."""
+    _pk_or_404(Post.objects, 'Пост не найден', pk=post_id)
+    mapping = columns(request, COMMENT)
+    page = cursor_page(request, Comment.objects.filter(post_id=post_id),
+                       mapping, date_field='created', ascending=True)
+    return stream(request, (shape(row, mapping) for row in page), page)
+
+
+@endpoint
+def groups(request):
+    """Группы по названию."""
+    mapping = columns(request, GROUP)
+    page = cursor_page(request, Group.objects.all(), mapping,
+                       date_field='title', ascending=True, parse=str)
+    return stream(request, (shape(row, mapping) for row in page), page)
+
+
+@endpoint
+def follows(request):
+    """Подписки текущего пользователя в порядке оформления."""
+    _require_user(request)
+    mapping = columns(request, FOLLOW)
+    page = cursor_page(request, Follow.objects.filter(user=request.user),
+                       mapping, date_field='id', ascending=True, parse=int)
+    return stream(request, (shape(row, mapping) for row in page), page)
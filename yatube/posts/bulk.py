@@ -0,0 +1,46 @@
+"""Массовая вставка строк для сидинга и импорта."""
+from contextlib import contextmanager
+from itertools import islice
+
+BATCH_SIZE = 1000
+
+
+def batches(iterable, size=BATCH_SIZE):
+    """Разбивает поток объектов на списки по size штук."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(model, objects, size=BATCH_SIZE, **kwargs):
+    """bulk_create пачками, возвращает число вставленных строк.
+
+    Размер одного INSERT Django подбирает сам под лимиты СУБД.
+    """
+    inserted = 0
+    for batch in batches(objects, size):
+        model.objects.bulk_create(batch, **kwargs)
+        inserted += len(batch)
+    return inserted
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Отключает auto_now_add, чтобы сохранить заданные даты.
+
+    Принимает пары (модель, имя поля).
+    """
+    changed = []
+    for model, name in fields:
+        field = model._meta.get_field(name)
+        if field.auto_now_add:
+            field.auto_now_add = False
+            changed.append(field)
+    try:
+        yield
+    finally:
+        for field in changed:
+            field.auto_now_add = True
@@ -0,0 +1,117 @@
+"""Условные GET для страниц постов: ETag до рендера.
+
+ETag собирается из версий фрагментов кэша, счётчиков и даты самого
+свежего поста по индексу — это пара дешёвых запросов вместо сборки
+страницы. Совпал — отвечаем 304 Not Modified. Last-Modified не ставим:
+дата свежего поста не меняется при правке или удалении, и клиент с
+одним If-Modified-Since получал бы устаревшую страницу.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import (CharField, Exists, OuterRef, Subquery,
+                              Value)
+from django.db.models.functions import Cast, Concat
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import counters, fragments
+from .models import Counter, Follow, Group, Post, User
+
+
+def _newest(posts, field='pub_date'):
+    """Дата самого свежего поста выборки, по индексу."""
+    return posts.order_by(f'-{field}').values(field)[:1]
+
+
+def _with_counter(queryset, scope, posts, **extra):
+    """pk, счётчик постов и дата свежего поста одним запросом."""
+    name = Concat(Value(f'{scope}:'),
+                  Cast(OuterRef('pk'), output_field=CharField()))
+    row = queryset.annotate(
+        total=Subquery(Counter.objects.filter(name=name).values('value')),
+        newest=Subquery(_newest(posts.filter(**{scope: OuterRef('pk')}))),
+        **extra,
+    ).values_list('pk', 'total', 'newest', *extra).first()
+    if row is None:
+        return None
+    pk, total, *rest = row
+    if total is None:
+        total = counters.get(f'{scope}:{pk}')
+    return (pk, total, *rest)
+
+
+def index(request):
+    # last_activity не раньше pub_date и растёт с каждым комментарием.
+    return (fragments.version('index'), counters.get(counters.TOTAL),
+            _newest(Post.objects, 'last_activity').first())
+
+
+def group_posts(request, slug):
+    row = _with_counter(Group.objects.filter(slug=slug), 'group',
+                        Post.objects)
+    if row is None:
+        return None
+    pk, total, newest = row
+    return fragments.version(f'group:{pk}'), total, newest
+
+
+def profile(request, username):
+    # Кнопка «Подписаться/Отписаться» зависит от подписки читателя.
+    following = Exists(Follow.objects.filter(user_id=request.user.pk,
+                                             author=OuterRef('pk')))
+    row = _with_counter(User.objects.filter(username=username), 'author',
+                        Post.objects, is_following=following)
+    if row is None:
+        return None
+    pk, total, newest, following = row
+    return fragments.version(f'profile:{pk}'), total, newest, following
+
+
+def post_detail(request, post_id):
+    row = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'last_activity', 'comment_count').first()
+    if row is None:
+        return None
+    author_id, last_activity, total = row
+    version = fragments.version(f'post:{post_id}', f'profile:{author_id}',
+                                fragments.GROUP_TITLES)
+    return version, total, last_activity
+
+
+def _etag(request, compute, kwargs):
+    """ETag страницы или None, если объекта нет."""
+    parts = compute(request, **kwargs)
+    if parts is None:
+        return None
+    # Разметка зависит от пользователя и его CSRF-токена.
+    key = (parts, request.get_full_path(), request.user.pk,
+           request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+    return hashlib.md5(repr(key).encode()).hexdigest()
+
+
+def conditional(compute):
+    """Отвечает 304 по ETag из compute и ставит Cache-Control.
+
+    compute(request, **kwargs) возвращает части ETag или None,
+    если объекта нет — тогда решает само представление.
+    """
+    def decorator(view):
+        checked = condition(
+            etag_func=lambda request, **kwargs: _etag(
+                request, compute, kwargs),
+        )(view)
+
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            response = checked(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, max_age=0,
+                                    must_revalidate=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,96 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Counter, Post, TrendingPost
+
+TOTAL = 'posts'
+TRENDING = 'trending'
+
+
+def author_key(author_id):
+    return f'author:{author_id}'
+
+
+def group_key(group_id):
+    return f'group:{group_id}'
+
+
+def keys_for(post):
+    """Счётчики, в которых учитывается пост."""
+    keys = [TOTAL, author_key(post.author_id)]
+    if post.group_id:
+        keys.append(group_key(post.group_id))
+    return keys
+
+
+def _count(name):
+    """Точное значение счётчика по таблице постов."""
+    if name == TOTAL:
+        return Post.objects.count()
+    if name == TRENDING:
+        return TrendingPost.objects.count()
+    scope, pk = name.split(':')
+    return Post.objects.filter(**{f'{scope}_id': pk}).count()
+
+
+def _fill(name):
+    """Создаёт недостающий счётчик по реальным данным."""
+    try:
+        with transaction.atomic():
+            return Counter.objects.create(name=name, value=_count(name)).value
+    except IntegrityError:
+        return Counter.objects.get(name=name).value
+
+
+def get(name):
+    """Значение счётчика, при отсутствии считается один раз."""
+    value = Counter.objects.filter(name=name).values_list(
+        'value', flat=True).first()
+    if value is None:
+        value = _fill(name)
+    return value
+
+
+def change(names, delta):
+    """Атомарно сдвигает счётчики на delta."""
+    for name in names:
+        counter = Counter.objects.filter(name=name)
+        if counter.update(value=F('value') + delta):
+            continue
+        # Подсчёт уже видит наше изменение, delta к нему не нужна.
+        value = _count(name)
+        try:
+            with transaction.atomic():
+                Counter.objects.create(name=name, value=value)
+        except IntegrityError:
+            # Счётчик создал сосед и мог не увидеть нашу строку.
+            counter.update(value=F('value') + delta)
+
+
+def put(name, value):
+    """Записывает значение счётчика целиком."""
+    Counter.objects.update_or_create(name=name, defaults={'value': value})
+
+
+def add(deltas):
+    """Сдвигает каждый счётчик на своё приращение: {имя: delta}."""
+    for name, delta in deltas.items():
+        change([name], delta)
+
+
+@transaction.atomic
+def reconcile():
+    """Пересчитывает все счётчики, возвращает число исправленных."""
+    actual = {TOTAL: Post.objects.count(),
+              TRENDING: TrendingPost.objects.count()}
+    for scope in ('author', 'group'):
+        rows = (Post.objects.filter(**{f'{scope}__isnull': False})
+                .values_list(scope).annotate(total=Count('pk')).order_by())
+        actual.update({f'{scope}:{pk}': total for pk, total in rows})
+    stored = dict(Counter.objects.values_list('name', 'value'))
+    drift = {name for name in actual.keys() | stored.keys()
+             if actual.get(name, 0) != stored.get(name)}
+    Counter.objects.all().delete()
+    Counter.objects.bulk_create(
+        Counter(name=name, value=value) for name, value in actual.items())
+    return len(drift)
@@ -0,0 +1,154 @@
+"""Выгрузка постов, комментариев и подписок пользователя.
+
+Строки читаются .iterator(chunk_size=CHUNK_SIZE) и сразу отдаются
+потоком в NDJSON или CSV, поэтому память не зависит от числа постов.
+С media=True выгрузка вместе с картинками постов пакуется в zip,
+который тоже пишется потоком.
+"""
+import csv
+import io
+import json
+import logging
+import zipfile
+from datetime import datetime
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Follow, Post
+
+CHUNK_SIZE = 500
+BLOCK_SIZE = 64 * 1024
+MEDIA_DIR = 'media'
+
+# Тип записи, выборка и поля записи -> путь для .values_list().
+SOURCES = (
+    ('post',
+     lambda user: Post.objects.filter(author=user).order_by('pub_date', 'id'),
+     {'id': 'id', 'date': 'pub_date', 'text': 'text',
+      'group': 'group__slug', 'image': 'image'}),
+    ('comment',
+     lambda user: Comment.objects.filter(author=user).order_by(
+         'created', 'id'),
+     {'id': 'id', 'date': 'created', 'text': 'text', 'post': 'post_id'}),
+    ('following',
+     lambda user: Follow.objects.filter(user=user).order_by('id'),
+     {'username': 'author__username'}),
+    ('follower',
+     lambda user: Follow.objects.filter(author=user).order_by('id'),
+     {'username': 'user__username'}),
+)
+COLUMNS = ('type', 'id', 'date', 'text', 'post', 'group', 'image',
+           'username')
+
+logger = logging.getLogger(__name__)
+
+
+def records(user):
+    """Все записи пользователя словарями, по одной."""
+    for kind, queryset, fields in SOURCES:
+        rows = queryset(user).values_list(*fields.values()).iterator(
+            chunk_size=CHUNK_SIZE)
+        for row in rows:
+            yield {'type': kind, **dict(zip(fields, row))}
+
+
+def ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder,
+                         ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """Файл для csv.writer, который просто возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), COLUMNS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow({
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in row.items()
+        })
+
+
+# Формат: сериализатор, тип содержимого.
+FORMATS = {
+    'ndjson': (ndjson, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+def blocks(lines):
+    """Склеивает строки в блоки около BLOCK_SIZE байт."""
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= BLOCK_SIZE:
+            yield ''.join(block).encode()
+            block, length = [], 0
+    if block:
+        yield ''.join(block).encode()
+
+
+class _Pipe(io.RawIOBase):
+    """Файл только на запись: zipfile пишет, генератор забирает байты."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def _media(user):
+    return Post.objects.filter(author=user).exclude(image='').values_list(
+        'image', flat=True).iterator(chunk_size=CHUNK_SIZE)
+
+
+def archive(user, export_format):
+    """Zip с выгрузкой и картинками постов, байтами по мере записи."""
+    serializer = FORMATS[export_format][0]
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        with bundle.open(f'export.{export_format}', 'w',
+                         force_zip64=True) as entry:
+            for block in blocks(serializer(records(user))):
+                entry.write(block)
+                yield from pipe.drain()
+        for name in _media(user):
+            try:
+                source = default_storage.open(name)
+            except OSError:
+                logger.warning('Картинки %s нет в хранилище', name)
+                continue
+            with source, bundle.open(f'{MEDIA_DIR}/{name}', 'w',
+                                     force_zip64=True) as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    yield from pipe.drain()
+    yield from pipe.drain()
+
+
+def export(user, export_format='ndjson', media=False):
+    """Поток байтов, тип содержимого и имя файла выгрузки."""
+    if media:
+        return (archive(user, export_format), 'application/zip',
+                f'{user.username}.zip')
+    serializer, content_type = FORMATS[export_format]
+    chunks = blocks(serializer(records(user)))
+    return chunks, content_type, f'{user.username}.{export_format}'
@@ -0,0 +1,76 @@
+from django.db import transaction
+
+from .models import FeedEntry, Follow, Post
+
+BATCH_SIZE = 500
+
+
+def _entries(user_ids, posts):
+    """Строки ленты для пар подписчик/пост."""
+    for user_id in user_ids:
+        for post in posts:
+            yield FeedEntry(user_id=user_id, author_id=post.author_id,
+                            post_id=post.pk, pub_date=post.pub_date)
+
+
+def _bulk_insert(entries):
+    """Вставка строк ленты пачками, дубли пропускаются."""
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) == BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def push_post(post):
+    """Рассылает новый пост в ленты подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_insert(_entries(followers.iterator(), [post]))
+
+
+def push_posts(posts):
+    """Рассылает пачку новых постов в ленты подписчиков их авторов."""
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    follows = Follow.objects.filter(author_id__in=by_author).values_list(
+        'user_id', 'author_id')
+    _bulk_insert(entry for user_id, author_id in follows.iterator()
+                 for entry in _entries([user_id], by_author[author_id]))
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты автора."""
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date')
+    _bulk_insert(_entries([user_id], posts.iterator()))
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def feed_for(user):
+    """Лента пользователя, упорядоченная по дате публикации."""
+    return FeedEntry.objects.filter(user=user).only('post_id', 'pub_date')
+
+
+def posts_for_entries(entries):
+    """Посты для строк ленты в том же порядке."""
+    post_ids = [entry.post_id for entry in entries]
+    posts = Post.objects.for_display().in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+@transaction.atomic
+def rebuild():
+    """Пересобирает все ленты из таблиц Follow и Post."""
+    FeedEntry.objects.all().delete()
+    follows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
@@ -0,0 +1,75 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow, Group
+
+# Устаревание решают версии; короткий TTL подстраховывает правки
+# в обход bump(): через shell, QuerySet.update() и т. п.
+TIMEOUT = settings.FRAGMENT_CACHE_TIMEOUT
+# Название группы выводится на странице каждого её поста: переименование
+# сбрасывает одну эту область, а не страницы всех постов группы.
+GROUP_TITLES = 'group-titles'
+
+
+def _key(scope):
+    return f'posts:version:{scope}'
+
+
+def _token():
+    return uuid4().hex[:12]
+
+
+def version(*scopes):
+    """Текущая версия набора областей кэша."""
+    keys = [_key(scope) for scope in scopes]
+    stored = cache.get_many(keys)
+    missing = {key: _token() for key in keys if key not in stored}
+    if missing:
+        cache.set_many(missing, None)
+        stored.update(missing)
+    return '.'.join(stored[key] for key in keys)
+
+
+def context(*scopes):
+    """Переменные шаблона для тега {% cache %}."""
+    return {'cache_timeout': TIMEOUT, 'cache_version': version(*scopes)}
+
+
+def bump(*scopes):
+    """Инвалидирует фрагменты областей, меняя их версии."""
+    cache.set_many({_key(scope): _token() for scope in scopes}, None)
+
+
+def post_scopes(post, *group_ids, feeds=True):
+    """Области, на которых виден пост, вместе с целыми страницами.
+
+    feeds=False не трогает ленты подписчиков: их столько, сколько
+    подписчиков у автора, а фрагменты лент догонит короткий TTL.
+    """
+    scopes = ['index', f'profile:{post.author_id}', f'post:{post.pk}',
+              'page:index', f'page:profile:{post.author.username}',
+              f'page:post:{post.pk}']
+    group_ids = {post.group_id, *group_ids} - {None}
+    scopes += [f'group:{pk}' for pk in group_ids]
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    scopes += [f'page:group:{slug}' for slug in slugs]
+    if not feeds:
+        return scopes
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    scopes += [f'feed:{user_id}' for user_id in followers]
+    return scopes
+
+
+def invalidate_post(post, *group_ids, feeds=True):
+    """Сбрасывает все фрагменты, где выводится пост."""
+    bump(*post_scopes(post, *group_ids, feeds=feeds))
+
+
+def invalidate_group(group):
+    """Сбрасывает всё, где выводится название группы."""
+    bump('index', 'page:index', f'group:{group.pk}',
+         f'page:group:{group.slug}', GROUP_TITLES)
@@ -0,0 +1,150 @@
+"""Очередь обработки загруженных картинок.
+
+Загрузка сразу ложится во временную папку, пост получает отметку
+image_pending, а задание ImageJob нормализует картинку: поворот по
+EXIF и удаление метаданных, ограничение размеров, перекодирование.
+Задания разбирает `manage.py process_images`; без IMAGE_JOBS_ASYNC
+(тесты, разработка) картинка обрабатывается сразу, в том же запросе.
+Если обработать не удалось, пост получает отметку image_failed, и
+вместо картинки автор видит сообщение об ошибке.
+"""
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import fragments, thumbnails
+from .models import ImageJob, Post
+
+STAGING_DIR = 'staging'
+MAX_SIDE = 2048
+MAX_ATTEMPTS = 3
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+}
+
+logger = logging.getLogger(__name__)
+
+
+def stage(post, previous=''):
+    """Уносит новую загрузку поста во временную папку.
+
+    Вызывается до post.save(): в поле остаётся прежняя картинка previous,
+    а файл дожидается обработки. Возвращает пару (файл, имя) или None.
+    """
+    image = post.image
+    if not image or image._committed:
+        return None
+    name = os.path.basename(image.name)
+    extension = os.path.splitext(name)[1].lower()
+    source = default_storage.save(
+        f'{STAGING_DIR}/{uuid4().hex}{extension}', image.file)
+    post.image = previous
+    post.image_pending = True
+    post.image_failed = False
+    return source, name
+
+
+def enqueue(post, staged):
+    """Ставит обработку картинки в очередь или выполняет сразу."""
+    if staged is None:
+        return
+    source, name = staged
+    job = ImageJob.objects.create(post=post, source=source, name=name)
+    if not getattr(settings, 'IMAGE_JOBS_ASYNC', True):
+        run(job.pk, in_request=True)
+
+
+def normalize(source):
+    """Картинка без EXIF, не больше MAX_SIDE, в исходном формате."""
+    image = Image.open(source)
+    image_format = image.format
+    if getattr(image, 'is_animated', False):
+        # Анимацию не пересобираем, чтобы не потерять кадры.
+        source.seek(0)
+        return source.read()
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > MAX_SIDE:
+        image.thumbnail((MAX_SIDE, MAX_SIDE))
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = BytesIO()
+    image.save(output, image_format, **SAVE_OPTIONS.get(image_format, {}))
+    return output.getvalue()
+
+
+def process(job, in_request=False):
+    """Обрабатывает картинку задания и подставляет её в пост."""
+    with default_storage.open(job.source) as source:
+        content = normalize(source)
+    post = job.post
+    name = default_storage.save(
+        Post.image.field.generate_filename(post, job.name),
+        ContentFile(content))
+    with transaction.atomic():
+        Post.objects.filter(pk=post.pk).update(image=name,
+                                               image_pending=False)
+        job.status = ImageJob.DONE
+        job.save(update_fields=['status', 'updated'])
+    default_storage.delete(job.source)
+    post.image, post.image_pending = name, False
+    fragments.invalidate_post(post)
+    if in_request:
+        thumbnails.schedule(post.image)
+    else:
+        thumbnails.build(name)
+    return name
+
+
+def claim(limit):
+    """Забирает до limit заданий из очереди, не пересекаясь с соседями."""
+    claimed = []
+    pending = ImageJob.objects.filter(status=ImageJob.PENDING)
+    for pk in pending.order_by('created').values_list('pk', flat=True)[
+            :limit]:
+        if ImageJob.objects.filter(pk=pk, status=ImageJob.PENDING).update(
+                status=ImageJob.PROCESSING, updated=timezone.now()):
+            claimed.append(pk)
+    return claimed
+
+
+def run(job_id, in_request=False):
+    """Выполняет задание с повторами; годится для пула процессов."""
+    job = ImageJob.objects.select_related('post__author').get(pk=job_id)
+    job.attempts += 1
+    try:
+        process(job, in_request)
+    except Exception as error:
+        logger.exception('Не удалось обработать картинку %s', job.source)
+        job.error = str(error)
+        # В запросе обработчика рядом может не быть, повторы — дело очереди.
+        if job.attempts < MAX_ATTEMPTS and not in_request:
+            job.status = ImageJob.PENDING
+        else:
+            job.status = ImageJob.FAILED
+            Post.objects.filter(pk=job.post_id).update(image_pending=False,
+                                                       image_failed=True)
+            default_storage.delete(job.source)
+            fragments.invalidate_post(job.post)
+        job.save(update_fields=['attempts', 'error', 'status', 'updated'])
+        return job.status
+    ImageJob.objects.filter(pk=job.pk).update(attempts=job.attempts)
+    return ImageJob.DONE
+
+
+def requeue_stale(minutes):
+    """Возвращает в очередь задания упавших обработчиков."""
+    stale = timezone.now() - timedelta(minutes=minutes)
+    return ImageJob.objects.filter(
+        status=ImageJob.PROCESSING, updated__lt=stale,
+    ).update(status=ImageJob.PENDING)
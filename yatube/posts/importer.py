@@ -0,0 +1,197 @@
+"""Массовый импорт групп, постов и комментариев.
+
+Записи в формате выгрузки (posts.export) с полем author читаются
+потоком и загружаются пачками. Авторы и группы ищутся одним запросом
+на пачку и создаются, если их нет. Постам id выдаются заранее подряд
+от post_base, соответствие id из файла и id на сайте пишется в
+ImportedPost: комментарии находят свой пост запросом, и в памяти не
+растёт словарь на весь файл. bulk_create не шлёт сигналов, поэтому
+ленты, счётчики, поиск и активность обновляются только для постов и
+комментариев пачки, в той же транзакции.
+"""
+import csv
+import json
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import activity, counters, feed, search
+from .bulk import BATCH_SIZE, bulk_insert
+from .models import Comment, Group, ImportedPost, Post, User
+
+FORMATS = ('ndjson', 'csv')
+
+
+def read_records(path, import_format):
+    """Записи файла словарями, пустые поля CSV отбрасываются."""
+    with open(path, encoding='utf-8', newline='') as source:
+        if import_format == 'csv':
+            for row in csv.DictReader(source):
+                yield {name: value for name, value in row.items() if value}
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def next_post_id():
+    """Первый id, который точно не занят и не был занят постами."""
+    last = Post.objects.aggregate(last=Max('id'))['last'] or 0
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s',
+                           [Post._meta.db_table])
+            row = cursor.fetchone()
+        last = max(last, row[0] if row else 0)
+    return last + 1
+
+
+def reserve_ids(model, last_id):
+    """Сдвигает счётчик первичного ключа за last_id.
+
+    Новые посты сайта во время импорта не займут выданные импорту id.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s',
+                           [table])
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)',
+                [table, last_id])
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT setval(pg_get_serial_sequence(%s, %s), '
+                           '%s)', [table, 'id', last_id])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                f'ALTER TABLE {connection.ops.quote_name(table)} '
+                f'AUTO_INCREMENT = {int(last_id) + 1}')
+
+
+def _date(value):
+    date = parse_datetime(value) if value else None
+    if date is None:
+        return timezone.now()
+    if timezone.is_naive(date):
+        return timezone.make_aware(date)
+    return date
+
+
+class Importer:
+    """Загружает пачки записей; вызывать внутри транзакции."""
+
+    def __init__(self, checkpoint, author=None, batch_size=BATCH_SIZE):
+        self.checkpoint = checkpoint
+        self.next_id = checkpoint.post_base
+        self.author = author
+        self.batch_size = batch_size
+        self.users = {}
+        self.groups = {}
+        self.skipped = 0
+
+    def assign(self, record):
+        """Выдаёт посту id; вызывается и для уже загруженных записей."""
+        if record.get('type') != 'post':
+            return
+        record['new_id'] = self.next_id
+        self.next_id += 1
+
+    def _author(self, record):
+        return record.get('author') or self.author
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - set(self.users) - {None}
+        if not missing:
+            return
+        password = make_password(None)
+        bulk_insert(User, (User(username=name, password=password)
+                           for name in sorted(missing)),
+                    self.batch_size, ignore_conflicts=True)
+        self.users.update(User.objects.filter(
+            username__in=missing).values_list('username', 'id'))
+
+    def resolve_groups(self, slugs, definitions):
+        missing = set(slugs) - set(self.groups) - {None}
+        if not missing:
+            return
+        bulk_insert(Group, (
+            Group(slug=slug,
+                  title=definitions.get(slug, {}).get('title') or slug,
+                  description=definitions.get(slug, {}).get(
+                      'description', ''))
+            for slug in sorted(missing)
+        ), self.batch_size, ignore_conflicts=True)
+        self.groups.update(Group.objects.filter(
+            slug__in=missing).values_list('slug', 'id'))
+
+    def resolve_posts(self, source_ids):
+        """id постов сайта для id из файла, загруженных этим импортом."""
+        return dict(ImportedPost.objects.filter(
+            checkpoint=self.checkpoint, source_id__in=set(source_ids),
+        ).values_list('source_id', 'post_id'))
+
+    def load(self, records):
+        """Вставляет пачку, возвращает число постов и комментариев."""
+        # Словари живут одну пачку, чтобы память не росла с файлом.
+        self.users, self.groups = {}, {}
+        by_type = {'group': [], 'post': [], 'comment': []}
+        for record in records:
+            by_type.get(record.get('type'), []).append(record)
+        self.skipped += len(records) - sum(map(len, by_type.values()))
+        definitions = {record['slug']: record for record in by_type['group']
+                       if record.get('slug')}
+        self.resolve_groups(
+            [*definitions,
+             *(record.get('group') for record in by_type['post'])],
+            definitions)
+        self.resolve_users(self._author(record)
+                           for record in by_type['post'] + by_type['comment'])
+        posts = list(self._posts(by_type['post']))
+        bulk_insert(Post, posts, self.batch_size)
+        bulk_insert(ImportedPost, (
+            ImportedPost(checkpoint=self.checkpoint,
+                         source_id=str(record['id']), post_id=record['new_id'])
+            for record in by_type['post']
+            if record.get('id') and self.users.get(self._author(record))
+        ), self.batch_size, ignore_conflicts=True)
+        comments = list(self._comments(by_type['comment'], self.resolve_posts(
+            str(record.get('post')) for record in by_type['comment'])))
+        bulk_insert(Comment, comments, self.batch_size)
+        self._propagate(posts, comments)
+        return len(posts), len(comments)
+
+    def _propagate(self, posts, comments):
+        """Ленты, счётчики, поиск и активность для строк пачки."""
+        feed.push_posts(posts)
+        counters.add(Counter(
+            key for post in posts for key in counters.keys_for(post)))
+        search.index_posts([post.pk for post in posts])
+        activity.refresh({comment.post_id for comment in comments})
+
+    def _posts(self, records):
+        for record in records:
+            author_id = self.users.get(self._author(record))
+            if author_id is None:
+                self.skipped += 1
+                continue
+            date = _date(record.get('date'))
+            yield Post(id=record['new_id'], author_id=author_id,
+                       group_id=self.groups.get(record.get('group')),
+                       text=record.get('text', ''),
+                       image=record.get('image') or '',
+                       pub_date=date, last_activity=date)
+
+    def _comments(self, records, post_ids):
+        for record in records:
+            author_id = self.users.get(self._author(record))
+            post_id = post_ids.get(str(record.get('post')))
+            if author_id is None or post_id is None:
+                self.skipped += 1
+                continue
+            yield Comment(post_id=post_id, author_id=author_id,
+                          text=record.get('text', ''),
+                          created=_date(record.get('date')))
@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from io import StringIO
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+# Модели и модули с ними импортируются внутри функций: процессы нагрузки
+# загружают этот модуль до django.setup().
+ROLES = ('read', 'write')
+
+
+def _worker(path, profile, role, seconds, barrier, results):
+    """Процесс нагрузки: поднимает Django на копии базы и шлёт запросы."""
+    database = settings.DATABASES['default']
+    database['NAME'] = path
+    database['CONN_MAX_AGE'] = profile['conn_max_age']
+    settings.SQLITE_PRAGMAS = profile['pragmas']
+    django.setup()
+
+    from django.test import Client
+    from django.urls import reverse
+
+    from posts.models import Post, User
+
+    post_ids = list(Post.objects.values_list('pk', flat=True)[:500])
+    client = Client()
+    if role == 'write':
+        client.force_login(User.objects.order_by('?').first())
+    connection.close()
+    barrier.wait()
+    done, errors, timings = 0, 0, []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        post_id = random.choice(post_ids)
+        started = time.perf_counter()
+        try:
+            if role == 'read':
+                response = client.get(reverse('posts:post_detail',
+                                              args=[post_id]))
+            elif random.random() < 0.5:
+                response = client.post(
+                    reverse('posts:add_comment', args=[post_id]),
+                    {'text': 'Комментарий под нагрузкой'})
+            else:
+                response = client.post(reverse('posts:post_create'),
+                                       {'text': 'Пост под нагрузкой'})
+        except OperationalError:
+            errors += 1
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code < 400:
+            done += 1
+        else:
+            errors += 1
+    results.put((role, done, errors, timings))
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite с умолчаниями '
+            'и с профилем SQLITE_PRAGMAS + CONN_MAX_AGE под параллельной '
+            'нагрузкой читателей и писателей. Отчёт в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=10.0,
+                            help='Длительность нагрузки на профиль.')
+        parser.add_argument('--posts', type=int, default=2000,
+                            help='Размер базы, заполняемой seed_data.')
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite.')
+        if not settings.SQLITE_PRAGMAS:
+            raise CommandError('Профиль выключен: SQLITE_TUNING=0.')
+        profiles = {
+            'default': {'pragmas': {}, 'conn_max_age': 0},
+            'tuned': {'pragmas': settings.SQLITE_PRAGMAS,
+                      'conn_max_age': 60},
+        }
+        directory = tempfile.mkdtemp()
+        try:
+            source = self.prepare(directory, options['posts'])
+            report = {
+                'posts': options['posts'],
+                'readers': options['readers'],
+                'writers': options['writers'],
+                'seconds': options['seconds'],
+                'profiles': {
+                    name: self.run(source, directory, name, profile, options)
+                    for name, profile in profiles.items()
+                },
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        default, tuned = (report['profiles'][name]
+                          for name in ('default', 'tuned'))
+        report['speedup'] = {
+            key: round(tuned[key] / default[key], 2) if default[key] else None
+            for key in ('reads_per_s', 'writes_per_s')
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def prepare(self, directory, posts):
+        """Файловая тестовая база с данными seed_data, без WAL."""
+        path = os.path.join(directory, 'source.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = path
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('seed_data', posts=posts,
+                         users=max(posts // 20, 10), comments=posts,
+                         images=0, seed=posts, stdout=StringIO())
+        finally:
+            connection.close()
+            settings.DATABASES['default']['NAME'] = old_name
+            connection.settings_dict['NAME'] = old_name
+            connection.settings_dict['TEST']['NAME'] = None
+        with closing(sqlite3.connect(path)) as database:
+            database.execute('PRAGMA journal_mode = DELETE')
+        return path
+
+    def run(self, source, directory, name, profile, options):
+        from .benchmark_views import percentile
+
+        path = os.path.join(directory, f'{name}.sqlite3')
+        shutil.copyfile(source, path)
+        context = multiprocessing.get_context('spawn')
+        roles = (['read'] * options['readers']
+                 + ['write'] * options['writers'])
+        barrier = context.Barrier(len(roles))
+        results = context.Queue()
+        processes = [
+            context.Process(target=_worker, args=(
+                path, profile, role, options['seconds'], barrier, results))
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        collected = []
+        try:
+            while len(collected) < len(processes):
+                if any(process.exitcode for process in processes):
+                    raise CommandError('Процесс нагрузки завершился '
+                                       'с ошибкой.')
+                try:
+                    collected.append(results.get(timeout=1))
+                except queue.Empty:
+                    continue
+        finally:
+            for process in processes:
+                if len(collected) < len(processes):
+                    process.terminate()
+                process.join()
+        summary = {}
+        for role in ROLES:
+            done = sum(item[1] for item in collected if item[0] == role)
+            timings = [timing for item in collected if item[0] == role
+                       for timing in item[3]]
+            summary[f'{role}s_per_s'] = round(done / options['seconds'], 1)
+            summary[f'{role}_errors'] = sum(
+                item[2] for item in collected if item[0] == role)
+            summary[f'{role}_p95_ms'] = (round(percentile(timings, 95), 3)
+                                         if timings else None)
+        return summary
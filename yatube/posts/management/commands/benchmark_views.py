@@ -0,0 +1,144 @@
+import json
+import math
+import resource
+import sys
+import time
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return ordered[rank - 1]
+
+
+def peak_rss_kb():
+    """Пиковый RSS процесса в килобайтах."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def dataset():
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def targets():
+    """Адреса страниц для самых нагруженных объектов и читатель ленты."""
+    reader = User.objects.annotate(
+        amount=Count('follower')).order_by('-amount').first()
+    if reader is None:
+        raise CommandError('База пуста, сначала запустите seed_data.')
+    author = User.objects.annotate(
+        amount=Count('posts')).order_by('-amount').first()
+    urls = {
+        'index': reverse('posts:index'),
+        'profile': reverse('posts:profile', args=[author.username]),
+        'follow_index': reverse('posts:follow_index'),
+    }
+    group = Group.objects.annotate(
+        amount=Count('post')).order_by('-amount').first()
+    if group:
+        urls['group_posts'] = reverse('posts:group_list', args=[group.slug])
+    post = Post.objects.annotate(
+        amount=Count('comments')).order_by('-amount').first()
+    if post:
+        urls['post_detail'] = reverse('posts:post_detail', args=[post.pk])
+    return reader, urls
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер страниц постов тестовым клиентом: '
+            'перцентили задержки, запросы к базе и пиковая память в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Замеров на каждую страницу.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument(
+            '--sizes', default='',
+            help='Числа постов через запятую: для каждого создаётся '
+                 'временная тестовая база и заполняется seed_data.')
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        if sizes:
+            runs = [self.run_on_test_db(size, options) for size in sizes]
+        else:
+            runs = [self.run(options)]
+        report = json.dumps(runs, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+
+    def run_on_test_db(self, size, options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command(
+                'seed_data', posts=size, users=max(size // 20, 10),
+                comments=size * 2, images=size // 20, seed=size,
+                stdout=StringIO())
+            cache.clear()
+            return self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        reader, urls = targets()
+        client = Client()
+        client.force_login(reader)
+        views = {}
+        for name, url in urls.items():
+            for _ in range(options['warmup']):
+                client.get(url)
+            timings, queries = [], []
+            for _ in range(options['requests']):
+                if options['cold']:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url} вернул {response.status_code}')
+            views[name] = {
+                'url': url,
+                **{f'p{pct}_ms': round(percentile(timings, pct), 3)
+                   for pct in PERCENTILES},
+                'queries_mean': round(sum(queries) / len(queries), 2),
+                'queries_max': max(queries),
+            }
+        return {
+            'dataset': dataset(),
+            'requests': options['requests'],
+            'cold_cache': options['cold'],
+            'views': views,
+            'peak_rss_kb': peak_rss_kb(),
+        }
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails, variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Строит недостающие миниатюры и варианты для уже загруженных '
+            'картинок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=thumbnails.WORKERS)
+
+    def handle(self, *args, **options):
+        names = {
+            post.image.name
+            for post in Post.objects.exclude(image='').only('image').iterator()
+            if thumbnails.lookup(post.image) is None
+            or variants.lookup(post.image) is None
+        }
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                list(executor.map(thumbnails.build, names))
+        else:
+            for name in names:
+                thumbnails.build(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Построено миниатюр: {len(names)}'))
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+
+# Составные индексы из миграции 0014.
+NEW_INDEXES = (
+    (Post, ('author_id', 'pub_date', 'id')),
+    (Post, ('group_id', 'pub_date', 'id')),
+    (Follow, ('user_id', 'author_id')),
+    (Comment, ('post_id', 'created', 'id')),
+    (FeedEntry, ('user_id', 'pub_date', 'post_id')),
+)
+
+
+def hot_queries():
+    """Запросы горячих страниц для первых попавшихся объектов."""
+    author = User.objects.filter(posts__isnull=False).first()
+    group = Group.objects.first()
+    follow = Follow.objects.first()
+    post = Post.objects.filter(comments__isnull=False).first()
+    queries = {
+        'index': Post.objects.for_display().order_by('-pub_date', '-id'),
+    }
+    if author:
+        queries['profile'] = author.posts.for_display().order_by(
+            '-pub_date', '-id')
+    if group:
+        queries['group_posts'] = group.post.for_display().order_by(
+            '-pub_date', '-id')
+    if follow:
+        queries['profile: following'] = Follow.objects.filter(
+            user_id=follow.user_id, author_id=follow.author_id)
+        queries['follow_index'] = FeedEntry.objects.filter(
+            user_id=follow.user_id).order_by('-pub_date', '-post_id')
+    if post:
+        queries['post_detail: comments'] = post.comments.select_related(
+            'author').order_by('created', 'id')
+    return {label: queryset[:10] for label, queryset in queries.items()}
+
+
+def new_index_names(cursor):
+    """Имена индексов, добавленных под горячие запросы."""
+    names = []
+    for model, columns in NEW_INDEXES:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table)
+        names += [name for name, info in constraints.items()
+                  if info['index'] and tuple(info['columns']) == columns]
+    return names
+
+
+class Command(BaseCommand):
+    help = ('Печатает планы запросов горячих страниц. С --compare '
+            'показывает планы без составных индексов и с ними (SQLite).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compare', action='store_true')
+
+    def print_plans(self, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for label, queryset in hot_queries().items():
+            self.stdout.write(f'{label}:')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    def handle(self, *args, **options):
+        if not options['compare']:
+            self.print_plans('Текущие планы')
+            return
+        if connection.vendor != 'sqlite':
+            raise CommandError('--compare поддерживается только для SQLite')
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in new_index_names(cursor):
+                    cursor.execute(f'DROP INDEX "{name}"')
+            self.print_plans('До: без составных индексов')
+            transaction.set_rollback(True)
+        self.print_plans('После: с составными индексами')
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты, комментарии и подписки пользователя '
+            'в NDJSON или CSV, с --media — zip вместе с картинками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=sorted(export.FORMATS),
+                            default='ndjson')
+        parser.add_argument('--media', action='store_true',
+                            help='Упаковать в zip вместе с картинками.')
+        parser.add_argument('--output',
+                            help='Файл выгрузки, по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.')
+        chunks, _, _ = export.export(user, options['format'],
+                                     media=options['media'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        elif options['media']:
+            raise CommandError('Zip пишется только в файл: укажите --output.')
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
@@ -0,0 +1,106 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import fragments
+from posts.bulk import BATCH_SIZE, batches, keep_dates
+from posts.importer import (FORMATS, Importer, next_post_id, read_records,
+                            reserve_ids)
+from posts.models import Comment, ImportCheckpoint, Post
+
+
+class Command(BaseCommand):
+    help = ('Загружает группы, посты и комментарии из NDJSON или CSV '
+            'в формате выгрузки export_user. Даты публикации сохраняются, '
+            'после сбоя повторный запуск продолжает с места остановки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--author',
+                            help='Автор записей, в которых он не указан.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Строк в одном bulk_create.')
+        parser.add_argument('--chunk', type=int, default=10000,
+                            help='Записей в одной транзакции.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Забыть контрольную точку и начать заново.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден.')
+        import_format = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson')
+        checkpoint = self.checkpoint(path, import_format, options['restart'])
+        importer = Importer(checkpoint, options['author'],
+                            options['batch_size'])
+        records = read_records(path, import_format)
+        done = checkpoint.records
+        if done:
+            self.stdout.write(f'Продолжаем с записи {done + 1}.')
+        started = time.monotonic()
+        posts = comments = 0
+        try:
+            # Уже загруженные записи только восстанавливают id постов.
+            for record in islice(records, done):
+                importer.assign(record)
+            for chunk in batches(self.assigned(records, importer),
+                                 options['chunk']):
+                with transaction.atomic(), keep_dates((Post, 'pub_date'),
+                                                      (Comment, 'created')):
+                    inserted = importer.load(chunk)
+                    done += len(chunk)
+                    checkpoint.records = done
+                    checkpoint.save(update_fields=['records', 'updated'])
+                posts += inserted[0]
+                comments += inserted[1]
+                self.report(done, posts + comments, started)
+        except ValueError as error:
+            raise CommandError(
+                f'Запись {done + 1} и далее не разобрать: {error}. '
+                f'Загружено {done}, запустите команду снова после '
+                f'исправления файла.')
+        checkpoint.delete()
+        elapsed = time.monotonic() - started
+        fragments.bump('index', 'page:index')
+        rate = (posts + comments) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов {posts}, комментариев {comments}, '
+            f'пропущено записей {importer.skipped} за {elapsed:.1f} с '
+            f'({rate:.0f} строк/с)'))
+
+    @staticmethod
+    def assigned(records, importer):
+        for record in records:
+            importer.assign(record)
+            yield record
+
+    def checkpoint(self, path, import_format, restart):
+        """Контрольная точка файла; новой резервируются id постов."""
+        source = os.path.abspath(path)
+        if restart:
+            ImportCheckpoint.objects.filter(source=source).delete()
+        checkpoint = ImportCheckpoint.objects.filter(source=source).first()
+        if checkpoint is not None:
+            return checkpoint
+        try:
+            total = sum(record.get('type') == 'post'
+                        for record in read_records(path, import_format))
+        except ValueError as error:
+            raise CommandError(f'Файл не разобрать: {error}')
+        with transaction.atomic():
+            post_base = next_post_id()
+            reserve_ids(Post, post_base + total - 1)
+            return ImportCheckpoint.objects.create(source=source,
+                                                   post_base=post_base)
+
+    def report(self, done, rows, started):
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(f'Записей {done}, вставлено строк {rows}, '
+                          f'{rate:.0f} строк/с')
@@ -0,0 +1,68 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Модели не импортируем на уровне модуля: процесс пула загружает его
+# раньше, чем успевает поднять Django.
+
+
+def _setup_worker():
+    """Процесс пула запускается с нуля и сам поднимает Django."""
+    django.setup()
+
+
+def _run(job_id):
+    from posts import images
+    return images.run(job_id)
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает очередь загруженных картинок в пуле процессов. '
+            'Нужен при IMAGE_JOBS_ASYNC = True.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=multiprocessing.cpu_count())
+        parser.add_argument('--batch', type=int, default=20)
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--stale-minutes', type=int, default=10,
+                            help='Через сколько минут вернуть зависшие.')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и выйти.')
+
+    def handle(self, *args, **options):
+        if options['workers'] > 1:
+            # spawn: дочерним процессам не достаются открытые соединения.
+            with ProcessPoolExecutor(
+                    options['workers'],
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_setup_worker) as executor:
+                self.loop(executor.map, options, close=True)
+        else:
+            self.loop(map, options)
+
+    def loop(self, run_all, options, close=False):
+        from posts import images
+        from posts.models import ImageJob
+
+        done = failed = 0
+        while True:
+            images.requeue_stale(options['stale_minutes'])
+            job_ids = images.claim(options['batch'])
+            if close:
+                # Пока работают процессы пула, соединение родителю не нужно.
+                connections.close_all()
+            for status in run_all(_run, job_ids):
+                done += status == ImageJob.DONE
+                failed += status == ImageJob.FAILED
+            if not job_ids:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {done}, с ошибкой: {failed}'))
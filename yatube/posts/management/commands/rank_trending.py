@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+from posts.bulk import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг популярных постов. Запускайте '
+            'периодически, например из cron раз в несколько минут.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=trending.SIZE,
+                            help='Мест в рейтинге.')
+        parser.add_argument('--days', type=float,
+                            default=trending.WINDOW.days,
+                            help='Учитывать посты с активностью за N дней.')
+        parser.add_argument('--chunk', type=int, default=BATCH_SIZE,
+                            help='Постов, читаемых за раз.')
+
+    def handle(self, *args, **options):
+        places = trending.rank(options['size'],
+                               timedelta(days=options['days']),
+                               options['chunk'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан, мест: {places}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+from posts.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из таблиц Follow и Post.'
+
+    def handle(self, *args, **options):
+        feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты пересобраны, строк: {FeedEntry.objects.count()}'))
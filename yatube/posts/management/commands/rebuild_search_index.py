@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        backend = 'FTS5' if search.uses_fts() else 'таблица слов'
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс пересобран ({backend})'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов по авторам, группам и всего.'
+
+    def handle(self, *args, **options):
+        drift = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны, исправлено: {drift}'))
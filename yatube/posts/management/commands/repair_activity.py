@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import activity
+from posts.bulk import BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает у постов число комментариев и время '
+            'последней активности.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Постов в одном UPDATE.')
+
+    def handle(self, *args, **options):
+        fixed = activity.repair(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Активность пересчитана, исправлено постов: {fixed}'))
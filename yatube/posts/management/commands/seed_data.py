@@ -0,0 +1,174 @@
+import random
+from datetime import timedelta
+from functools import lru_cache
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts import activity, counters, feed, fragments, search
+from posts.bulk import bulk_insert, keep_dates
+from posts.models import Comment, Follow, Group, Post, User
+
+# Сколько разных картинок делить между постами.
+IMAGE_FILES = 10
+WORDS = ('лев', 'кот', 'утро', 'море', 'город', 'книга', 'ветер', 'песня',
+         'дорога', 'сад', 'зима', 'лето', 'огонь', 'река', 'друг', 'дом')
+
+
+@lru_cache(maxsize=None)
+def zipf_weights(size, exponent):
+    """Накопленные веса степенного распределения для random.choices."""
+    total, weights = 0, []
+    for rank in range(1, size + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными: пользователи, группы, '
+            'посты, комментарии, картинки и граф подписок со степенным '
+            'распределением популярности авторов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--images', type=int, default=500,
+                            help='Сколько постов получат картинку.')
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Среднее число подписок пользователя.')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель степени для популярности.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разбросать даты.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Зерно генератора для повторяемых данных.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.options = options
+        with transaction.atomic(), keep_dates((Post, 'pub_date'),
+                                              (Comment, 'created')):
+            users = self.create_users()
+            groups = self.create_groups()
+            posts = self.create_posts(users, groups)
+            comments = self.create_comments(users, posts)
+            follows = self.create_follows(users)
+        # bulk_create не шлёт сигналов: ленты, счётчики и поиск пересобираем.
+        feed.rebuild()
+        counters.reconcile()
+        activity.repair()
+        search.rebuild()
+        fragments.bump('index')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, групп {len(groups)}, '
+            f'постов {len(posts)}, комментариев {comments}, '
+            f'подписок {follows}'))
+
+    def random_date(self, after=None):
+        start = after or self.now - timedelta(days=self.options['days'])
+        return start + (self.now - start) * self.rng.random()
+
+    def random_text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def popular(self, population, count):
+        """Выборка с перекосом в пользу первых элементов."""
+        weights = zipf_weights(len(population), self.options['exponent'])
+        return self.rng.choices(population, cum_weights=weights, k=count)
+
+    def create_users(self):
+        prefix = self.options['prefix']
+        start = User.objects.filter(username__startswith=f'{prefix}_').count()
+        password = make_password(None)
+        bulk_insert(User, (
+            User(username=f'{prefix}_{number}', password=password,
+                 first_name=f'Автор {number}')
+            for number in range(start, start + self.options['users'])
+        ), self.options['batch_size'])
+        user_ids = list(User.objects.filter(
+            username__startswith=f'{prefix}_').values_list('id', flat=True))
+        self.rng.shuffle(user_ids)
+        return user_ids
+
+    def create_groups(self):
+        prefix = self.options['prefix']
+        start = Group.objects.filter(slug__startswith=f'{prefix}-').count()
+        bulk_insert(Group, (
+            Group(title=f'Группа {number}', slug=f'{prefix}-{number}',
+                  description=self.random_text(10))
+            for number in range(start, start + self.options['groups'])
+        ), self.options['batch_size'])
+        return list(Group.objects.filter(
+            slug__startswith=f'{prefix}-').values_list('id', flat=True))
+
+    def create_images(self):
+        names = []
+        for number in range(min(IMAGE_FILES, self.options['images'])):
+            name = f'posts/{self.options["prefix"]}_{number}.png'
+            if not default_storage.exists(name):
+                color = tuple(self.rng.randrange(256) for _ in range(3))
+                content = BytesIO()
+                Image.new('RGB', (960, 339), color).save(content, 'PNG')
+                name = default_storage.save(
+                    name, ContentFile(content.getvalue()))
+            names.append(name)
+        return names
+
+    def create_posts(self, users, groups):
+        count = self.options['posts']
+        authors = self.popular(users, count)
+        with_image = set(self.rng.sample(
+            range(count), min(count, self.options['images'])))
+        images = self.create_images() if with_image else []
+        bulk_insert(Post, (
+            Post(author_id=authors[number], text=self.random_text(30),
+                 group_id=(self.rng.choice(groups)
+                           if groups and self.rng.random() < 0.7 else None),
+                 image=(self.rng.choice(images)
+                        if number in with_image else ''),
+                 pub_date=self.random_date())
+            for number in range(count)
+        ), self.options['batch_size'])
+        return list(Post.objects.filter(
+            author__username__startswith=f'{self.options["prefix"]}_',
+        ).values_list('id', 'pub_date'))
+
+    def create_comments(self, users, posts):
+        if not posts:
+            return 0
+        commented = self.popular(posts, self.options['comments'])
+        return bulk_insert(Comment, (
+            Comment(post_id=post_id, author_id=self.rng.choice(users),
+                    text=self.random_text(8),
+                    created=self.random_date(after=pub_date))
+            for post_id, pub_date in commented
+        ), self.options['batch_size'])
+
+    def create_follows(self, users):
+        """Подписки: число на пользователя экспоненциально, цели по Ципфу."""
+        if len(users) < 2:
+            return 0
+        mean = self.options['follows']
+        pairs = set()
+        for user_id in users:
+            amount = min(int(self.rng.expovariate(1 / mean)) if mean else 0,
+                         len(users) - 1)
+            for author_id in self.popular(users, amount):
+                if author_id != user_id:
+                    pairs.add((user_id, author_id))
+        return bulk_insert(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+        ), self.options['batch_size'], ignore_conflicts=True)
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    """Оставляет одну подписку на каждую пару читатель/автор."""
+    Follow = apps.get_model('posts', 'Follow')
+    keep = (Follow.objects.values('user', 'author')
+            .annotate(first=Min('id')).values_list('first', flat=True))
+    Follow.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_auto_20261018_0458'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_follows,
+                             migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_944a68_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='posts_feede_user_id_ec0439_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='follow',
+            unique_together={('user', 'author')},
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created', 'id'], name='posts_comme_post_id_9660d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='posts_feede_user_id_cbce2a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='posts_post_author__075f1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='posts_post_group_i_6a7ae9_idx'),
+        ),
+    ]
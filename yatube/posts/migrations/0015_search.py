@@ -0,0 +1,72 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:09
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Схема и токенизатор на момент миграции, независимо от posts.search.
+FTS_TABLE = 'posts_search'
+CREATE_FTS_TABLE = (f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                    f'USING fts5(text, group_title)')
+FILL_FTS_TABLE = (
+    f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+    'SELECT p.id, p.text, COALESCE(g.title, \'\') FROM posts_post p '
+    'LEFT JOIN posts_group g ON g.id = p.group_id')
+WORD = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+
+
+def tokenize(text):
+    words = (word[:MAX_TERM_LENGTH] for word in WORD.findall(text.lower()))
+    return list(dict.fromkeys(words))
+
+
+def fts5_available(conn):
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def build_index(apps, schema_editor):
+    """FTS5 на SQLite, где он есть, иначе таблица слов."""
+    if fts5_available(schema_editor.connection):
+        schema_editor.execute(CREATE_FTS_TABLE)
+        schema_editor.execute(FILL_FTS_TABLE)
+        return
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    for post in Post.objects.select_related('group').iterator():
+        title = post.group.title if post.group else ''
+        SearchTerm.objects.bulk_create([
+            SearchTerm(term=term, post=post)
+            for term in tokenize(f'{post.text} {title}')
+        ])
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_indexes_for_hot_queries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+            options={
+                'unique_together': {('term', 'post')},
+            },
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
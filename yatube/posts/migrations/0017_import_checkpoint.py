@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_image_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Файл импорта')),
+                ('records', models.BigIntegerField(default=0, verbose_name='Загружено записей')),
+                ('post_base', models.BigIntegerField(verbose_name='Первый id постов импорта')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
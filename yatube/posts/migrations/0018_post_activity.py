@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:35
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+import django.utils.timezone
+
+
+def fill_activity(apps, schema_editor):
+    """Заполняет новые поля по уже существующим комментариям."""
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+        'post')
+    Post.objects.update(
+        comment_count=Coalesce(Subquery(
+            comments.annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()), 0),
+        last_activity=Greatest(F('pub_date'), Coalesce(Subquery(
+            comments.annotate(newest=Max('created')).values('newest')),
+            F('pub_date'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_activity',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Последняя активность'),
+        ),
+        migrations.RunPython(fill_activity, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-last_activity', '-id'], name='posts_post_last_ac_5d915a_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('rank', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Очки')),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Post')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:57
+
+from django.db import migrations
+import django.utils.timezone
+import posts.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_imported_post'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='last_activity',
+            field=posts.models.ActivityField(default=django.utils.timezone.now, editable=False, verbose_name='Последняя активность'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_activity_from_pub_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_failed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Картинку не удалось обработать'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -12,6 +13,41 @@ class Follow(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='following')
 
+    class Meta:
+        """Изменение поведения модели."""
+
+        unique_together = ('user', 'author')
+
+
+class PostQuerySet(models.QuerySet):
+    """Выборки постов для страниц."""
+
+    # Поля, которые выводят шаблоны постов, остальное не загружаем.
+    DISPLAY_FIELDS = (
+        'id', 'text', 'pub_date', 'image', 'image_pending', 'image_failed',
+        'author_id', 'group_id', 'comment_count', 'last_activity',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__title', 'group__slug',
+    )
+
+    def for_display(self):
+        """Посты с автором и группой за один запрос."""
+        return self.select_related('author', 'group').only(
+            *self.DISPLAY_FIELDS)
+
+
+class ActivityField(models.DateTimeField):
+    """Дата активности; у нового поста — его дата публикации.
+
+    Поле идёт после pub_date, поэтому при INSERT дата публикации от
+    auto_now_add уже выставлена, и второй UPDATE не нужен.
+    """
+
+    def pre_save(self, model_instance, add):
+        if add:
+            setattr(model_instance, self.attname, model_instance.pub_date)
+        return super().pre_save(model_instance, add)
+
 
 class Post(models.Model):
     """Посты."""
@@ -30,11 +66,27 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_pending = models.BooleanField(
+        'Картинка обрабатывается', default=False, editable=False)
+    image_failed = models.BooleanField(
+        'Картинку не удалось обработать', default=False, editable=False)
+    # Поддерживаются сигналами комментариев, см. posts.activity.
+    comment_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False)
+    last_activity = ActivityField(
+        'Последняя активность', default=timezone.now, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         """Изменение поведения модели."""
 
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id']),
+            models.Index(fields=['group', '-pub_date', '-id']),
+            models.Index(fields=['-last_activity', '-id']),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -67,6 +119,168 @@ class Comment(models.Model):
     text = models.TextField('Содержание', help_text='Введите текст')
     created = models.DateTimeField('Дата публикации', auto_now_add=True)
 
+    class Meta:
+        """Изменение поведения модели."""
+
+        ordering = ['created']
+        indexes = [models.Index(fields=['post', 'created', 'id'])]
+
     def __str__(self):
         """Читабельность объекта."""
         return self.text
+
+    def delete(self, *args, **kwargs):
+        """Удаляет комментарий и пересчитывает поля его поста.
+
+        Не через post_delete: приёмник сигнала отключал быстрый каскад
+        и при удалении поста слал UPDATE на каждый его комментарий.
+        """
+        from .activity import comment_removed
+        result = super().delete(*args, **kwargs)
+        comment_removed(self)
+        return result
+
+
+class FeedEntry(models.Model):
+    """Материализованная лента подписок."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='feed')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='feed_entries')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        """Изменение поведения модели."""
+
+        ordering = ['-pub_date']
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.user_id}: {self.post_id}'
+
+
+class Counter(models.Model):
+    """Денормализованные счётчики постов."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.IntegerField(default=0)
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.name}={self.value}'
+
+
+class SearchTerm(models.Model):
+    """Обратный индекс слов постов, если FTS5 недоступен."""
+
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='search_terms')
+
+    class Meta:
+        """Изменение поведения модели."""
+
+        unique_together = ('term', 'post')
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.term}: {self.post_id}'
+
+
+class ImageJob(models.Model):
+    """Задание на обработку загруженной картинки поста."""
+
+    PENDING, PROCESSING, DONE, FAILED = (
+        'pending', 'processing', 'done', 'failed')
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (PROCESSING, 'Обрабатывается'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='image_jobs')
+    source = models.CharField('Файл во временной папке', max_length=255)
+    name = models.CharField('Исходное имя', max_length=255)
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Изменение поведения модели."""
+
+        indexes = [models.Index(fields=['status', 'created'])]
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.post_id}: {self.status}'
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей файла импорта уже загружено.
+
+    Обновляется в той же транзакции, что и вставка пачки, поэтому
+    после сбоя импорт продолжается ровно с первой незагруженной записи.
+    """
+
+    source = models.CharField('Файл импорта', max_length=255, unique=True)
+    records = models.BigIntegerField('Загружено записей', default=0)
+    post_base = models.BigIntegerField('Первый id постов импорта')
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.source}: {self.records}'
+
+
+class TrendingPost(models.Model):
+    """Место поста в рейтинге популярных, см. posts.trending."""
+
+    rank = models.PositiveIntegerField('Место', primary_key=True)
+    post = models.OneToOneField(Post, on_delete=models.CASCADE,
+                                related_name='trending')
+    score = models.FloatField('Очки')
+
+    class Meta:
+        """Изменение поведения модели."""
+
+        ordering = ['rank']
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.rank}: {self.post_id}'
+
+
+class ImportedPost(models.Model):
+    """Какой пост сайта создан для id поста из файла импорта.
+
+    Комментарии следующих пачек находят свой пост запросом, а не по
+    словарю в памяти; строки удаляются вместе с контрольной точкой.
+    """
+
+    checkpoint = models.ForeignKey(ImportCheckpoint, on_delete=models.CASCADE,
+                                   related_name='posts')
+    source_id = models.CharField('Id в файле импорта', max_length=64)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='+')
+
+    class Meta:
+        """Изменение поведения модели."""
+
+        unique_together = ('checkpoint', 'source_id')
+
+    def __str__(self):
+        """Читабельность объекта."""
+        return f'{self.source_id}: {self.post_id}'
@@ -0,0 +1,85 @@
+"""Кэш целых страниц для гостей.
+
+Включается настройкой PAGE_CACHE. Ключ — версия областей страницы
+(см. fragments) и полный путь с параметрами, поэтому сброс области
+убирает все её адреса сразу. Тело хранится сжатым.
+"""
+import hashlib
+import zlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from . import fragments
+
+HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+def is_guest(request):
+    """Гость без сессии определяется без запроса к базе."""
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return True
+    return not request.user.is_authenticated
+
+
+def _key(scopes, request):
+    if isinstance(scopes, str):
+        scopes = (scopes,)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'posts:page:{fragments.version(*scopes)}:{path}'
+
+
+def _cacheable(request, response):
+    """Только обычные 200 без cookie и без форм с CSRF-токеном."""
+    return (response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED'))
+
+
+def _pack(response):
+    return {
+        'body': zlib.compress(response.content),
+        'headers': {name: response[name] for name in HEADERS
+                    if response.has_header(name)},
+    }
+
+
+def _unpack(request, stored):
+    response = HttpResponse(zlib.decompress(stored['body']))
+    for name, value in stored['headers'].items():
+        response[name] = value
+    response['X-Page-Cache'] = 'hit'
+    return get_conditional_response(
+        request, etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response)
+
+
+def for_guests(scope):
+    """Отдаёт гостям страницу из кэша.
+
+    scope(**kwargs) — область страницы или кортеж областей.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if (not getattr(settings, 'PAGE_CACHE', False)
+                    or request.method not in ('GET', 'HEAD')
+                    or not is_guest(request)):
+                return view(request, *args, **kwargs)
+            key = _key(scope(**kwargs), request)
+            stored = cache.get(key)
+            if stored is not None:
+                return _unpack(request, stored)
+            response = view(request, *args, **kwargs)
+            if _cacheable(request, response):
+                cache.set(key, _pack(response), settings.PAGE_CACHE_TIMEOUT)
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapped
+    return decorator
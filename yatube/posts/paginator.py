@@ -0,0 +1,153 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT, PREVIOUS = 'n', 'p'
+
+
+def _text(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def encode_cursor(direction, value=None, pk=None):
+    """Непрозрачный курсор: направление и ключ (значение поля, id)."""
+    key = f'{_text(value)}|{pk}' if value is not None else '|'
+    raw = f'{direction}|{key}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse=parse_datetime):
+    """Разбор курсора, None для пустого или испорченного.
+
+    parse превращает текст ключа в значение поля, по умолчанию — в дату.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, key = raw.decode().split('|', 1)
+        # Значение (например, название) само может содержать «|».
+        value, pk = key.rsplit('|', 1)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    if not value:
+        return direction, None, None
+    try:
+        value = parse(value)
+    except ValueError:
+        return None
+    if value is None or not pk.isdigit():
+        return None
+    return direction, value, int(pk)
+
+
+class CursorPage(Page):
+    """Страница по курсору: навигация по курсорам, без COUNT(*).
+
+    Номер страницы по курсору неизвестен: у первой он 1, у остальных 2 —
+    этого хватает, чтобы has_previous() и соседние номера были верны.
+    """
+
+    def __init__(self, object_list, number, paginator, next_cursor=None,
+                 previous_cursor=None, last_cursor=None):
+        super().__init__(object_list, number, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.last_cursor = last_cursor
+
+    def __repr__(self):
+        return f'<CursorPage {self.number}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        if not self.has_next():
+            raise EmptyPage('Это последняя страница')
+        return self.number + 1
+
+    def previous_page_number(self):
+        if not self.has_previous():
+            raise EmptyPage('Это первая страница')
+        return self.number - 1
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    По умолчанию от новых к старым, ascending=True — от старых к новым.
+    Ключом может быть и не дата: тогда parse разбирает его из курсора,
+    например parse=str для названий. Строки могут быть и объектами,
+    и словарями из .values(). Один пагинатор отдаёт одну страницу:
+    get_page() выставляет num_pages по курсорам, так что и обычный Page
+    на нём не делает COUNT(*).
+    """
+
+    keyset = True
+
+    def __init__(self, object_list, per_page, date_field='pub_date',
+                 id_field='id', ascending=False, parse=parse_datetime):
+        # Порядок ключа задаём сразу: без него Paginator предупреждает
+        # о неупорядоченной выборке.
+        ordering = ((date_field, id_field) if ascending
+                    else (f'-{date_field}', f'-{id_field}'))
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.date_field = date_field
+        self.id_field = id_field
+        self.ascending = ascending
+        self.parse = parse
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            return obj[self.date_field], obj[self.id_field]
+        return getattr(obj, self.date_field), getattr(obj, self.id_field)
+
+    def _after(self, date, pk, lookup):
+        """Условие «строго после ключа» в заданном направлении."""
+        return (Q(**{f'{self.date_field}__{lookup}': date})
+                | Q(**{self.date_field: date,
+                       f'{self.id_field}__{lookup}': pk}))
+
+    def get_page(self, cursor):
+        """Страница после курсора; без курсора — первая."""
+        direction, date, pk = (decode_cursor(cursor, self.parse)
+                               or (NEXT, None, None))
+        backwards = direction == PREVIOUS
+        if backwards == self.ascending:
+            ordering = (f'-{self.date_field}', f'-{self.id_field}')
+            lookup = 'lt'
+        else:
+            ordering = (self.date_field, self.id_field)
+            lookup = 'gt'
+        queryset = self.object_list.order_by(*ordering)
+        if date is not None:
+            queryset = queryset.filter(self._after(date, pk, lookup))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        has_next = date is not None if backwards else has_more
+        has_previous = has_more if backwards else date is not None
+        next_cursor = (encode_cursor(NEXT, *self._key(rows[-1]))
+                       if rows and has_next else None)
+        previous_cursor = (encode_cursor(PREVIOUS, *self._key(rows[0]))
+                           if rows and has_previous else None)
+        number = 2 if previous_cursor else 1
+        self.num_pages = number + (1 if next_cursor else 0)
+        return CursorPage(rows, number, self, next_cursor, previous_cursor,
+                          encode_cursor(PREVIOUS))
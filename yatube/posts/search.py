@@ -0,0 +1,119 @@
+"""Полнотекстовый поиск по постам и названиям групп.
+
+На SQLite с FTS5 индекс лежит в виртуальной таблице posts_search,
+иначе — в таблице слов SearchTerm. Индекс обновляется сигналами.
+"""
+import re
+
+from django.db import connection, transaction
+
+from .bulk import bulk_insert
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_search'
+MAX_TERMS = 10
+_WORD = re.compile(r'\w+')
+_has_fts = {}
+
+
+def tokenize(text):
+    """Уникальные слова текста в нижнем регистре, в порядке появления."""
+    words = (word[:64] for word in _WORD.findall(text.lower()))
+    return list(dict.fromkeys(words))
+
+
+def uses_fts():
+    """Есть ли в текущей базе таблица FTS5, ответ запоминается."""
+    key = (connection.alias, connection.settings_dict['NAME'])
+    if key not in _has_fts:
+        _has_fts[key] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names())
+    return _has_fts[key]
+
+
+def _documents(posts):
+    for post in posts:
+        yield post.pk, post.text, post.group.title if post.group else ''
+
+
+def _write(documents):
+    documents = list(documents)
+    post_ids = [post_id for post_id, _, _ in documents]
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                               [(post_id,) for post_id in post_ids])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, group_title) '
+                f'VALUES (%s, %s, %s)', documents)
+        return
+    SearchTerm.objects.filter(post_id__in=post_ids).delete()
+    bulk_insert(SearchTerm, (
+        SearchTerm(term=term, post_id=post_id)
+        for post_id, text, group_title in documents
+        for term in tokenize(f'{text} {group_title}')
+    ))
+
+
+def index_post(post):
+    """Переиндексирует один пост."""
+    _write(_documents([post]))
+
+
+def index_posts(post_ids):
+    """Переиндексирует посты по id, например после bulk_create."""
+    _write(_documents(Post.objects.filter(pk__in=post_ids).select_related(
+        'group').only('pk', 'text', 'group__title')))
+
+
+def remove_post(post_id):
+    """Убирает пост из индекса."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [post_id])
+    else:
+        SearchTerm.objects.filter(post_id=post_id).delete()
+
+
+def index_group(group):
+    """Переиндексирует посты группы после смены названия."""
+    _write(_documents(group.post.select_related('group').iterator()))
+
+
+@transaction.atomic
+def rebuild():
+    """Строит индекс заново по всем постам."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        SearchTerm.objects.all().delete()
+    posts = Post.objects.select_related('group').only(
+        'pk', 'text', 'group__title').order_by('pk')
+    batch = []
+    for document in _documents(posts.iterator()):
+        batch.append(document)
+        if len(batch) == 500:
+            _write(batch)
+            batch = []
+    _write(batch)
+
+
+def search(query):
+    """Посты, содержащие все слова запроса, без упорядочивания."""
+    terms = tokenize(query)[:MAX_TERMS]
+    if not terms:
+        return Post.objects.none()
+    if uses_fts():
+        match = ' '.join(f'"{term}"' for term in terms)
+        return Post.objects.extra(
+            where=[f'{Post._meta.db_table}.id IN (SELECT rowid FROM '
+                   f'{FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)'],
+            params=[match])
+    posts = Post.objects.all()
+    for term in terms:
+        posts = posts.filter(pk__in=SearchTerm.objects.filter(
+            term=term).values('post_id'))
+    return posts
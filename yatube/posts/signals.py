@@ -0,0 +1,79 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import activity, counters, feed, search
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(post_save, sender=Post)
+def push_to_feeds(sender, instance, created, **kwargs):
+    """Новый пост попадает в ленты подписчиков."""
+    if created:
+        feed.push_post(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    """Запоминает прежнюю группу редактируемого поста."""
+    if instance.pk:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    """Счётчики растут с новым постом и следуют за сменой группы."""
+    if created:
+        counters.change(counters.keys_for(instance), 1)
+        return
+    old_group_id = getattr(instance, '_old_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        if old_group_id:
+            counters.change([counters.group_key(old_group_id)], -1)
+        if instance.group_id:
+            counters.change([counters.group_key(instance.group_id)], 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    """Счётчики уменьшаются при удалении поста."""
+    counters.change(counters.keys_for(instance), -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    """Подписка заполняет ленту постами автора."""
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feed(sender, instance, **kwargs):
+    """Отписка убирает посты автора из ленты."""
+    feed.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Пост попадает в поисковый индекс и обновляется в нём."""
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Удалённый пост пропадает из поиска."""
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def reindex_group(sender, instance, created, **kwargs):
+    """Новое название группы находится поиском по её постам."""
+    if not created:
+        search.index_group(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    """Пост узнаёт о новом комментарии."""
+    if created:
+        activity.comment_added(instance)
@@ -0,0 +1,34 @@
+from django import template
+
+from posts import thumbnails, variants
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail_url(post):
+    """Адрес готовой миниатюры поста или пустая строка."""
+    if hasattr(post, 'thumbnail'):
+        thumbnail = post.thumbnail
+    else:
+        thumbnail = thumbnails.lookup(post.image)
+    return thumbnail.url if thumbnail else ''
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post):
+    """Картинка поста: <picture> с вариантами, миниатюра или оригинал."""
+    if hasattr(post, 'variants'):
+        found = post.variants
+    else:
+        found = variants.lookup(post.image)
+    sources = variants.sources(found)
+    fallback = dict(sources).get('image/jpeg', '')
+    return {
+        'post': post,
+        'thumbnail': thumbnail_url(post),
+        'sources': [(mime, srcset) for mime, srcset in sources
+                    if mime != 'image/jpeg'],
+        'srcset': fallback,
+        'sizes': variants.SIZES,
+    }
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class ActivityTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.quiet = Post.objects.create(author=cls.user, text='Тихий')
+        cls.post = Post.objects.create(author=cls.user, text='Обсуждаемый')
+        # Новее обоих, но без комментариев.
+        cls.newest = Post.objects.create(author=cls.user, text='Свежий')
+
+    def setUp(self):
+        self.client.force_login(ActivityTests.user)
+
+    def test_comment_updates_post(self):
+        """Комментарий увеличивает счётчик и сдвигает активность."""
+        post = ActivityTests.post
+        self.client.post(reverse('posts:add_comment', args=[post.pk]),
+                         {'text': 'Первый'})
+        comment = Comment.objects.get()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.last_activity, comment.created)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(post.last_activity, post.pub_date)
+
+    def test_new_post_activity_is_pub_date(self):
+        """Активность нового поста — его дата публикации, без UPDATE."""
+        with CaptureQueriesContext(connection) as queries:
+            post = Post.objects.create(author=ActivityTests.user,
+                                       text='Новый')
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('UPDATE "posts_post"')])
+        post.refresh_from_db()
+        self.assertEqual(post.last_activity, post.pub_date)
+
+    def test_post_delete_cascades_without_updates(self):
+        """Удаление поста не трогает его счётчик на каждый комментарий."""
+        def deleting(comments):
+            post = Post.objects.create(author=ActivityTests.user,
+                                       text='Удаляемый')
+            Comment.objects.bulk_create(
+                Comment(post=post, author=ActivityTests.user, text='Ещё')
+                for _ in range(comments))
+            with CaptureQueriesContext(connection) as queries:
+                post.delete()
+            return len(queries)
+
+        self.assertEqual(deleting(50), deleting(1))
+        self.assertFalse(Comment.objects.filter(text='Ещё').exists())
+
+    def test_active_ordering(self):
+        """Активные обсуждения идут первыми, курсор листает дальше."""
+        Comment.objects.create(post=ActivityTests.post,
+                               author=ActivityTests.user, text='Обсуждаем')
+        response = self.client.get(reverse('posts:index'),
+                                   {'order': 'active'})
+        posts = list(response.context['page_obj'])
+        self.assertEqual(posts, [ActivityTests.post, ActivityTests.newest,
+                                 ActivityTests.quiet])
+        self.assertContains(response, 'Комментариев: 1')
+        self.assertEqual(
+            list(self.client.get(reverse('posts:index')).context[
+                'page_obj'])[0], ActivityTests.newest)
+
+    def test_edit_keeps_count(self):
+        """Правка поста не затирает число комментариев."""
+        post = ActivityTests.post
+        Comment.objects.create(post=post, author=ActivityTests.user,
+                               text='Есть')
+        self.client.post(reverse('posts:post_edit', args=[post.pk]),
+                         {'text': 'Исправленный'})
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Исправленный')
+        self.assertEqual(post.comment_count, 1)
+
+    def test_repair(self):
+        """Команда пересчитывает только разошедшиеся посты."""
+        Comment.objects.create(post=ActivityTests.post,
+                               author=ActivityTests.user, text='Был')
+        Post.objects.filter(pk=ActivityTests.post.pk).update(
+            comment_count=5, last_activity=timezone.now() - timedelta(days=1))
+        output = StringIO()
+        call_command('repair_activity', stdout=output)
+        self.assertIn('исправлено постов: 1', output.getvalue())
+        post = Post.objects.get(pk=ActivityTests.post.pk)
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(post.last_activity,
+                         post.comments.get().created)
@@ -0,0 +1,163 @@
+import json
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author',
+                                              first_name='Лев')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.comments = [
+            Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                                   text=f'Комментарий {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTests.reader)
+
+    def get(self, name, client=None, params=None, **kwargs):
+        response = (client or self.client).get(
+            reverse(f'posts:{name}', kwargs=kwargs), params or {})
+        if response.streaming:
+            response.json_data = json.loads(
+                b''.join(response.streaming_content))
+        else:
+            response.json_data = response.json()
+        return response
+
+    def ids(self, response):
+        return [item['id'] for item in response.json_data['data']]
+
+    def newest_ids(self):
+        return [post.pk for post in reversed(ApiTests.posts)]
+
+    def test_posts_cursor_pages(self):
+        """Лента по курсору: страницы без пропусков и повторов."""
+        with self.assertNumQueries(1):
+            first = self.get('api_posts', params={'limit': 3})
+        self.assertEqual(first['Content-Type'], 'application/json')
+        self.assertEqual(self.ids(first), self.newest_ids()[:3])
+        self.assertIsNone(first.json_data['links']['previous'])
+        second = self.client.get(first.json_data['links']['next'])
+        data = json.loads(b''.join(second.streaming_content))
+        self.assertEqual([item['id'] for item in data['data']],
+                         self.newest_ids()[3:])
+        self.assertIsNone(data['links']['next'])
+
+    def test_sparse_fields_and_expand(self):
+        """fields оставляет нужные поля, expand вкладывает связи."""
+        response = self.get('api_posts', params={
+            'fields': 'id,text', 'expand': 'author,group'})
+        newest, with_group = response.json_data['data'][:2]
+        self.assertEqual(set(newest), {'id', 'text', 'author', 'group'})
+        self.assertIsNone(newest['group'])
+        self.assertEqual(with_group['group'],
+                         {'slug': 'group', 'title': 'Группа'})
+        self.assertEqual(with_group['author'], {
+            'username': 'author', 'first_name': 'Лев', 'last_name': ''})
+        plain = self.get('api_posts').json_data['data'][1]
+        self.assertEqual(plain['author'], 'author')
+        self.assertEqual(plain['group'], 'group')
+        self.assertIsNone(plain['image'])
+
+    def test_unknown_field(self):
+        """Неизвестное поле — ошибка 400 в JSON."""
+        for params in ({'fields': 'password'}, {'expand': 'text'},
+                       {'limit': 'много'}):
+            with self.subTest(params=params):
+                response = self.get('api_posts', params=params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json_data)
+
+    def test_group_and_profile_posts(self):
+        """Посты группы и автора; несуществующие — 404."""
+        response = self.get('api_group_posts', slug='group')
+        self.assertEqual(self.ids(response),
+                         [ApiTests.posts[3].pk, ApiTests.posts[1].pk])
+        response = self.get('api_profile_posts', username='author')
+        self.assertEqual(self.ids(response), self.newest_ids())
+        self.assertEqual(
+            self.get('api_group_posts', slug='nope').status_code, 404)
+        self.assertEqual(
+            self.get('api_profile_posts', username='nope').status_code, 404)
+
+    def test_follow_feed(self):
+        """Лента подписок только для своих, пустая без подписок."""
+        self.assertEqual(self.get('api_follow_posts').status_code, 401)
+        response = self.get('api_follow_posts', self.reader_client,
+                            {'fields': 'id'})
+        self.assertEqual(response.json_data['data'],
+                         [{'id': pk} for pk in self.newest_ids()])
+        follows = self.get('api_follows', self.reader_client)
+        self.assertEqual(follows.json_data['data'], [{'author': 'author'}])
+
+    def test_pages_ordered_before_paginator(self):
+        """Выборки упорядочены заранее: Paginator не предупреждает."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            self.get('api_groups')
+            self.get('api_follows', self.reader_client)
+
+    def test_groups_and_follows_pages(self):
+        """Группы и подписки тоже листаются курсором."""
+        Group.objects.create(title='Б | с чертой', slug='b')
+        Group.objects.create(title='А', slug='a')
+        first = self.get('api_groups', params={'limit': 2,
+                                               'fields': 'slug'})
+        self.assertEqual(first.json_data['data'],
+                         [{'slug': 'a'}, {'slug': 'b'}])
+        second = self.client.get(first.json_data['links']['next'])
+        self.assertEqual(
+            json.loads(b''.join(second.streaming_content))['data'],
+            [{'slug': 'group'}])
+        for number in range(3):
+            Follow.objects.create(
+                user=ApiTests.reader,
+                author=User.objects.create_user(username=f'writer{number}'))
+        follows = self.get('api_follows', self.reader_client, {'limit': 3})
+        self.assertEqual([item['author'] for item in follows.json_data[
+            'data']], ['author', 'writer0', 'writer1'])
+        rest = self.reader_client.get(follows.json_data['links']['next'])
+        self.assertEqual(
+            json.loads(b''.join(rest.streaming_content))['data'],
+            [{'author': 'writer2'}])
+
+    def test_post_detail_and_comments(self):
+        """Пост отдельно и его комментарии от старых к новым."""
+        post = ApiTests.posts[0]
+        response = self.get('api_post_detail', post_id=post.pk)
+        self.assertEqual(response.json_data['data']['text'], post.text)
+        self.assertEqual(
+            self.get('api_post_detail', post_id=0).status_code, 404)
+        response = self.get('api_post_comments', post_id=post.pk,
+                            params={'fields': 'text', 'limit': 2})
+        self.assertEqual(response.json_data['data'],
+                         [{'text': 'Комментарий 0'},
+                          {'text': 'Комментарий 1'}])
+        self.assertIsNotNone(response.json_data['links']['next'])
+
+    def test_read_only(self):
+        """Изменять данные через API нельзя."""
+        response = self.reader_client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
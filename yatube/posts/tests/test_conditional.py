@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='Пост')
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.guest_client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 без рендера шаблона."""
+        for url in ConditionalGetTests.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn('Last-Modified', response)
+                again = self.revalidate(url, response)
+                self.assertEqual(again.status_code, 304)
+                self.assertIsNone(again.context)
+
+    def test_etag_changes_with_content(self):
+        """Новый или удалённый пост меняет ETag лент и профиля."""
+        for change in ('create', 'delete'):
+            responses = {url: self.guest_client.get(url)
+                         for url in ConditionalGetTests.urls[:3]}
+            if change == 'create':
+                Post.objects.create(author=ConditionalGetTests.user,
+                                    group=ConditionalGetTests.group,
+                                    text='Новый')
+            else:
+                Post.objects.filter(text='Новый').delete()
+            for url, response in responses.items():
+                with self.subTest(url=url, change=change):
+                    self.assertEqual(
+                        self.revalidate(url, response).status_code, 200)
+
+    def test_new_comment_changes_detail_etag(self):
+        """Новый комментарий меняет ETag страницы поста."""
+        url = ConditionalGetTests.urls[3]
+        response = self.guest_client.get(url)
+        Comment.objects.create(post=ConditionalGetTests.post,
+                               author=ConditionalGetTests.user, text='Да')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_cache_control(self):
+        """Гостям — общий кэш с ревалидацией, пользователям — частный."""
+        url = ConditionalGetTests.urls[0]
+        response = self.guest_client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        client = Client()
+        client.force_login(ConditionalGetTests.user)
+        private = client.get(url)
+        self.assertIn('private', private['Cache-Control'])
+        self.assertNotEqual(private['ETag'], response['ETag'])
+        self.assertEqual(self.revalidate(url, response, client).status_code,
+                         200)
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет кнопку на профиле, значит и ETag."""
+        reader = User.objects.create_user(username='reader')
+        client = Client()
+        client.force_login(reader)
+        url = ConditionalGetTests.urls[2]
+        response = client.get(url)
+        client.get(reverse('posts:profile_follow',
+                           kwargs={'username': 'author'}))
+        again = self.revalidate(url, response, client)
+        self.assertEqual(again.status_code, 200)
+        self.assertContains(again, 'Отписаться')
+
+    def test_if_modified_since_alone_is_ignored(self):
+        """Без Last-Modified один If-Modified-Since не даёт 304."""
+        for url in ConditionalGetTests.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=http_date())
+                self.assertEqual(response.status_code, 200)
+
+    def test_validators_skip_aggregates(self):
+        """Ревалидация списков не считает COUNT по постам."""
+        for url in ConditionalGetTests.urls[:3]:
+            response = self.guest_client.get(url)
+            with self.subTest(url=url), \
+                    CaptureQueriesContext(connection) as queries:
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304)
+                self.assertFalse(any('COUNT(' in query['sql'].upper()
+                                     for query in queries.captured_queries))
+
+    def test_missing_object_still_404(self):
+        """Без объекта решает само представление."""
+        response = self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
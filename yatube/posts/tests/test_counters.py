@@ -0,0 +1,66 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters
+from ..models import Counter, Group, Post
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая',
+                                               slug='other')
+        cls.post = Post.objects.create(author=cls.user, text='Пост',
+                                       group=cls.group)
+
+    def test_counters_follow_create_and_delete(self):
+        """Счётчики меняются при создании и удалении поста."""
+        author = counters.author_key(CounterTests.user.pk)
+        post = Post.objects.create(author=CounterTests.user, text='Ещё')
+        self.assertEqual(counters.get(author), 2)
+        self.assertEqual(counters.get(counters.TOTAL), 2)
+        post.delete()
+        self.assertEqual(counters.get(author), 1)
+        self.assertEqual(counters.get(counters.TOTAL), 1)
+
+    def test_group_change_moves_count(self):
+        """Смена группы переносит пост между счётчиками групп."""
+        post = CounterTests.post
+        post.group = CounterTests.other_group
+        post.save()
+        self.assertEqual(
+            counters.get(counters.group_key(CounterTests.group.pk)), 0)
+        self.assertEqual(
+            counters.get(counters.group_key(CounterTests.other_group.pk)),
+            1)
+
+    def test_change_keeps_delta_after_lost_race(self):
+        """Счётчик создал сосед до нас: своя delta всё равно прибавляется."""
+        name = 'author:0'
+
+        def neighbour_first(counter_name):
+            # Сосед вставил счётчик, ещё не видя нашей строки.
+            Counter.objects.create(name=counter_name, value=7)
+            return 8
+
+        with mock.patch.object(counters, '_count',
+                               side_effect=neighbour_first):
+            counters.change([name], 1)
+        self.assertEqual(Counter.objects.get(name=name).value, 8)
+
+    def test_reconcile_fixes_drift(self):
+        """Команда сверки исправляет разошедшиеся счётчики."""
+        Counter.objects.filter(name=counters.TOTAL).update(value=100)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(counters.get(counters.TOTAL), 1)
+        self.assertEqual(
+            counters.get(counters.author_key(CounterTests.user.pk)), 1)
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import export
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        group = Group.objects.create(title='Группа', slug='group')
+        cls.image_post = Post.objects.create(
+            author=cls.user, text='С картинкой', group=group,
+            image=SimpleUploadedFile('export.gif', SMALL_GIF, 'image/gif'))
+        Post.objects.create(author=cls.user, text='Без картинки')
+        Comment.objects.create(post=cls.image_post, author=cls.user,
+                               text='Свой комментарий')
+        Follow.objects.create(user=cls.user, author=cls.other)
+        Follow.objects.create(user=cls.other, author=cls.user)
+        cls.url = reverse('posts:profile_export',
+                          kwargs={'username': 'author'})
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_ndjson_stream(self):
+        """NDJSON: по строке на запись, каждая выборка одним запросом."""
+        response = self.client_for(ExportTests.user).get(ExportTests.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('author.ndjson', response['Content-Disposition'])
+        with self.assertNumQueries(len(export.SOURCES)):
+            body = b''.join(response.streaming_content)
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row['type'] for row in rows],
+                         ['post', 'post', 'comment', 'following',
+                          'follower'])
+        self.assertEqual(rows[0]['text'], 'С картинкой')
+        self.assertEqual(rows[0]['group'], 'group')
+        self.assertEqual(rows[3]['username'], 'other')
+
+    def test_csv(self):
+        """CSV с общей шапкой для всех типов записей."""
+        response = self.client_for(ExportTests.user).get(
+            ExportTests.url, {'format': 'csv'})
+        body = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[2]['type'], 'comment')
+        self.assertEqual(rows[2]['post'], str(ExportTests.image_post.pk))
+
+    def test_zip_with_media(self):
+        """Zip пишется потоком и содержит выгрузку и картинки."""
+        response = self.client_for(ExportTests.staff).get(
+            ExportTests.url, {'media': '1'})
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        bundle = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(bundle.testzip())
+        self.assertEqual(
+            bundle.read(f'media/{ExportTests.image_post.image.name}'),
+            SMALL_GIF)
+        self.assertEqual(
+            len(bundle.read('export.ndjson').decode().splitlines()), 5)
+
+    def test_access(self):
+        """Чужие данные выгружает только персонал, формат проверяется."""
+        self.assertEqual(
+            self.client_for(ExportTests.other).get(
+                ExportTests.url).status_code, 403)
+        self.assertEqual(
+            self.client_for(ExportTests.staff).get(
+                ExportTests.url).status_code, 200)
+        self.assertEqual(
+            self.client_for(ExportTests.user).get(
+                ExportTests.url, {'format': 'xml'}).status_code, 400)
+        self.assertRedirects(
+            self.client.get(ExportTests.url),
+            f'{reverse("users:login")}?next={ExportTests.url}')
+
+    def test_command(self):
+        """Команда пишет выгрузку в файл."""
+        path = os.path.join(TEMP_MEDIA_ROOT, 'author.csv')
+        call_command('export_user', 'author', format='csv', output=path)
+        with open(path, encoding='utf-8') as exported:
+            self.assertEqual(len(exported.read().splitlines()), 6)
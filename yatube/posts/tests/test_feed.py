@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.old_post = Post.objects.create(author=cls.author,
+                                           text='Старая запись')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedTests.follower)
+
+    def follow(self):
+        self.authorized_client.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': FeedTests.author}))
+
+    def test_follow_backfills_feed(self):
+        """Подписка добавляет в ленту старые посты автора."""
+        self.follow()
+        self.assertTrue(FeedEntry.objects.filter(
+            user=FeedTests.follower, post=FeedTests.old_post).exists())
+
+    def test_new_post_pushed_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков."""
+        self.follow()
+        post = Post.objects.create(author=FeedTests.author, text='Новая')
+        self.assertTrue(FeedEntry.objects.filter(
+            user=FeedTests.follower, post=post).exists())
+        self.assertFalse(FeedEntry.objects.filter(
+            user=FeedTests.other).exists())
+
+    def test_unfollow_prunes_feed(self):
+        """Отписка очищает ленту от постов автора."""
+        self.follow()
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': FeedTests.author}))
+        self.assertFalse(FeedEntry.objects.filter(
+            user=FeedTests.follower).exists())
+
+    def test_follow_index_reads_feed_in_order(self):
+        """Лента выводит посты от новых к старым."""
+        self.follow()
+        post = Post.objects.create(author=FeedTests.author, text='Новая')
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']),
+                         [post, FeedTests.old_post])
+
+    def test_rebuild_feeds_command(self):
+        """Команда пересобирает ленты из подписок."""
+        Follow.objects.create(user=FeedTests.follower,
+                              author=FeedTests.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(FeedEntry.objects.filter(
+            user=FeedTests.follower).count(), 1)
@@ -12,7 +12,7 @@ from ..models import Group, Post, User, Comment
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_JOBS_ASYNC=False)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import fragments
+from ..models import Follow, Post
+from ..views import AMOUNT
+
+User = get_user_model()
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Первый')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(FragmentCacheTests.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(FragmentCacheTests.reader)
+
+    def test_post_create_invalidates_lists(self):
+        """Новый пост через форму сразу виден на главной и в ленте."""
+        Follow.objects.create(user=FragmentCacheTests.reader,
+                              author=FragmentCacheTests.author)
+        self.reader_client.get(reverse('posts:index'))
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.author_client.post(reverse('posts:post_create'),
+                                {'text': 'Свежий пост'})
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                self.assertContains(self.reader_client.get(url),
+                                    'Свежий пост')
+
+    def test_follow_invalidates_feed(self):
+        """Подписка сбрасывает фрагмент ленты подписчика."""
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.reader_client.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': FragmentCacheTests.author}))
+        self.assertContains(
+            self.reader_client.get(reverse('posts:follow_index')), 'Первый')
+
+    def test_comment_invalidates_post(self):
+        """Новый комментарий виден на странице поста."""
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': FragmentCacheTests.post.pk})
+        self.reader_client.get(url)
+        self.reader_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': FragmentCacheTests.post.pk}),
+            {'text': 'Комментарий'})
+        self.assertContains(self.reader_client.get(url), 'Комментарий')
+
+    def test_comment_keeps_follower_feeds(self):
+        """Комментарий не сбрасывает ленты подписчиков автора."""
+        Follow.objects.create(user=FragmentCacheTests.reader,
+                              author=FragmentCacheTests.author)
+        feed_scope = f'feed:{FragmentCacheTests.reader.pk}'
+        feed_version = fragments.version(feed_scope)
+        post_version = fragments.version(
+            f'post:{FragmentCacheTests.post.pk}')
+        self.reader_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': FragmentCacheTests.post.pk}),
+            {'text': 'Комментарий'})
+        self.assertEqual(fragments.version(feed_scope), feed_version)
+        self.assertNotEqual(
+            fragments.version(f'post:{FragmentCacheTests.post.pk}'),
+            post_version)
+
+    def test_fragment_hit_skips_page_query(self):
+        """При попадании во фрагмент выборка страницы не выполняется."""
+        url = reverse('posts:index')
+        page_query = f'LIMIT {AMOUNT + 1}'
+        with CaptureQueriesContext(connection) as first:
+            self.reader_client.get(url)
+        with CaptureQueriesContext(connection) as second:
+            self.reader_client.get(url)
+        self.assertTrue(any(page_query in query['sql']
+                            for query in first.captured_queries))
+        self.assertFalse(any(page_query in query['sql']
+                             for query in second.captured_queries))
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import images
+from ..models import ImageJob, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_upload(name='photo.jpg', size=(3000, 1000)):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повернуть на 90°.
+    exif[0x010F] = 'Camera'
+    content = BytesIO()
+    Image.new('RGB', size, (200, 10, 10)).save(content, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, content.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_JOBS_ASYNC=False)
+class ImageQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ImageQueueTests.user)
+
+    def create(self, text, upload):
+        self.authorized_client.post(reverse('posts:post_create'),
+                                    {'text': text, 'image': upload})
+        return Post.objects.get(text=text)
+
+    def staged_files(self):
+        path = os.path.join(TEMP_MEDIA_ROOT, images.STAGING_DIR)
+        return os.listdir(path) if os.path.isdir(path) else []
+
+    def test_upload_normalized_in_request(self):
+        """Без очереди картинка обрабатывается сразу: без EXIF и в рамках."""
+        post = self.create('Фото', jpeg_upload())
+        self.assertFalse(post.image_pending)
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        with default_storage.open(post.image.name) as stored:
+            image = Image.open(stored)
+            width, height = image.size
+            self.assertEqual(height, images.MAX_SIDE)
+            self.assertLess(width, height)
+            self.assertFalse(image.getexif())
+        self.assertEqual(post.image_jobs.get().status, ImageJob.DONE)
+        self.assertEqual(self.staged_files(), [])
+
+    @override_settings(IMAGE_JOBS_ASYNC=True)
+    def test_worker_processes_queue(self):
+        """В очереди пост ждёт с заглушкой, обработчик подставляет картинку."""
+        post = self.create('В очереди', jpeg_upload('queued.jpg', (20, 10)))
+        self.assertTrue(post.image_pending)
+        self.assertFalse(post.image)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, 'Картинка обрабатывается')
+        call_command('process_images', workers=1, once=True,
+                     stdout=StringIO())
+        post.refresh_from_db()
+        self.assertFalse(post.image_pending)
+        self.assertEqual(post.image.name, 'posts/queued.jpg')
+        self.assertEqual(self.staged_files(), [])
+
+    @override_settings(IMAGE_JOBS_ASYNC=True)
+    def test_broken_upload_fails_after_retries(self):
+        """Битый файл после повторов помечается ошибкой, автор её видит."""
+        post = self.create('Битая', jpeg_upload('broken.jpg', (20, 10)))
+        job = post.image_jobs.get()
+        with default_storage.open(job.source, 'wb') as staged:
+            staged.write(b'not an image')
+        with self.assertLogs('posts.images', 'ERROR'):
+            call_command('process_images', workers=1, once=True,
+                         stdout=StringIO())
+        job.refresh_from_db()
+        post.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.FAILED)
+        self.assertEqual(job.attempts, images.MAX_ATTEMPTS)
+        self.assertFalse(post.image_pending)
+        self.assertTrue(post.image_failed)
+        self.assertEqual(self.staged_files(), [])
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, 'Картинку не удалось обработать')
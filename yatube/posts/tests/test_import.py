@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .. import counters, search
+from ..importer import Importer
+from ..models import (Comment, FeedEntry, Follow, Group, ImportCheckpoint,
+                      ImportedPost, Post)
+
+User = get_user_model()
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+OLD_DATE = datetime(2015, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def write_lines(name, lines):
+    path = os.path.join(TEMP_DIR, name)
+    with open(path, 'w', encoding='utf-8') as output:
+        output.write('\n'.join(lines) + '\n')
+    return path
+
+
+def records():
+    yield {'type': 'group', 'slug': 'moved', 'title': 'Переехавшая'}
+    for number in range(1, 5):
+        yield {'type': 'post', 'id': 100 + number, 'author': 'writer',
+               'group': 'moved', 'text': f'Старый пост {number}',
+               'date': OLD_DATE.isoformat()}
+    yield {'type': 'comment', 'post': 101, 'author': 'reader',
+           'text': 'К первому', 'date': OLD_DATE.isoformat()}
+    yield {'type': 'comment', 'post': 104, 'author': 'writer',
+           'text': 'К последнему', 'date': OLD_DATE.isoformat()}
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def run_import(self, path, **options):
+        output = StringIO()
+        call_command('import_posts', path, stdout=output, **options)
+        return output.getvalue()
+
+    def test_import_keeps_dates_and_links(self):
+        """Даты сохраняются, комментарии находят новые посты."""
+        path = write_lines('import.ndjson',
+                           [json.dumps(record) for record in records()])
+        output = self.run_import(path, chunk=3)
+        self.assertIn('строк/с', output)
+        self.assertEqual(self.client.get('/group/moved/').context[
+            'page_obj'].paginator.count, 4)
+        posts = Post.objects.filter(author__username='writer')
+        self.assertEqual(posts.count(), 4)
+        self.assertTrue(all(post.pub_date == OLD_DATE for post in posts))
+        self.assertEqual(Group.objects.get(slug='moved').title,
+                         'Переехавшая')
+        first = Comment.objects.get(text='К первому')
+        self.assertEqual(first.post.text, 'Старый пост 1')
+        self.assertEqual(first.author.username, 'reader')
+        self.assertEqual(first.created, OLD_DATE)
+        self.assertEqual(Comment.objects.get(text='К последнему').post.text,
+                         'Старый пост 4')
+        self.assertFalse(ImportCheckpoint.objects.exists())
+        author = User.objects.get(username='writer')
+        new_post = Post.objects.create(author=author, text='Новый')
+        self.assertGreater(new_post.pk, max(post.pk for post in posts))
+
+    def test_import_updates_only_its_rows(self):
+        """Ленты, счётчики, поиск и активность — по строкам импорта."""
+        writer = User.objects.create_user(username='writer')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=writer)
+        Post.objects.create(author=reader, text='Свой пост')
+        path = write_lines('scoped.ndjson',
+                           [json.dumps(record) for record in records()])
+        with mock.patch('posts.feed.rebuild') as feed_rebuild, \
+                mock.patch('posts.search.rebuild') as search_rebuild:
+            self.run_import(path, chunk=3)
+        feed_rebuild.assert_not_called()
+        search_rebuild.assert_not_called()
+        self.assertEqual(FeedEntry.objects.filter(user=reader).count(), 4)
+        self.assertEqual(counters.get(counters.TOTAL), 5)
+        self.assertEqual(counters.get(counters.author_key(writer.pk)), 4)
+        self.assertEqual(search.search('переехавшая').count(), 4)
+        first = Post.objects.get(text='Старый пост 1')
+        self.assertEqual(first.comment_count, 1)
+        self.assertFalse(ImportedPost.objects.exists())
+
+    def test_resume_after_failure(self):
+        """После сбоя импорт продолжается без дублей."""
+        path = write_lines('resume.ndjson',
+                           [json.dumps(record) for record in records()])
+        load = Importer.load
+        calls = []
+
+        def failing_load(importer, chunk):
+            calls.append(chunk)
+            if len(calls) == 3:
+                raise ConnectionError('База недоступна')
+            return load(importer, chunk)
+
+        with mock.patch.object(Importer, 'load', failing_load):
+            with self.assertRaises(ConnectionError):
+                self.run_import(path, chunk=2)
+        self.assertEqual(ImportCheckpoint.objects.get().records, 4)
+        self.assertEqual(Post.objects.count(), 3)
+        output = self.run_import(path, chunk=2)
+        self.assertIn('Продолжаем с записи 5', output)
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(Comment.objects.get(text='К первому').post.text,
+                         'Старый пост 1')
+
+    def test_broken_file(self):
+        """Битый файл отклоняется до вставки."""
+        path = write_lines('broken.ndjson', ['{"type": "post"', '{}'])
+        with self.assertRaises(CommandError):
+            self.run_import(path)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_export_round_trip(self):
+        """CSV из export_user загружается с --author."""
+        source = User.objects.create_user(username='source')
+        post = Post.objects.create(author=source, text='Экспорт')
+        Comment.objects.create(post=post, author=source, text='Свой')
+        path = os.path.join(TEMP_DIR, 'source.csv')
+        call_command('export_user', 'source', format='csv', output=path)
+        self.run_import(path, author='copy')
+        copied = Post.objects.get(author__username='copy')
+        self.assertEqual(copied.text, 'Экспорт')
+        self.assertEqual(copied.pub_date, post.pub_date)
+        self.assertEqual(copied.comments.get().text, 'Свой')
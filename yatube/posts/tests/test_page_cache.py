@@ -0,0 +1,151 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import fragments, page_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE=True)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text='Первый пост')
+        cls.index = reverse('posts:index')
+        cls.group_url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        cls.profile = reverse('posts:profile', kwargs={'username': 'author'})
+        cls.detail = reverse('posts:post_detail',
+                             kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PageCacheTests.user)
+
+    def assertCached(self, url, expected=True):
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertEqual(response.get('X-Page-Cache') == 'hit', expected,
+                         url)
+        return response
+
+    def test_guest_hit_without_queries(self):
+        """Повторный запрос гостя отдаётся из кэша без базы."""
+        for url in (PageCacheTests.index, PageCacheTests.group_url,
+                    PageCacheTests.profile, PageCacheTests.detail):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
+                self.assertEqual(response.content, first.content)
+
+    def test_hit_answers_conditional_get(self):
+        """Из кэша тоже отвечаем 304 по ETag."""
+        response = self.assertCached(PageCacheTests.index)
+        again = self.guest_client.get(PageCacheTests.index,
+                                      HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_query_string_is_part_of_key(self):
+        """Разные параметры — разные записи кэша."""
+        self.assertCached(PageCacheTests.index)
+        response = self.guest_client.get(PageCacheTests.index, {'page': 1})
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_authenticated_not_cached(self):
+        """Пользователь с сессией всегда получает свежую страницу."""
+        for _ in range(2):
+            response = self.authorized_client.get(PageCacheTests.detail)
+            self.assertNotIn('X-Page-Cache', response)
+            self.assertIsNotNone(response.context)
+
+    def test_csrf_forms_not_cached(self):
+        """Ответ с CSRF-токеном в кэш не попадает."""
+        request = RequestFactory().get('/')
+        request.META['CSRF_COOKIE_USED'] = True
+        self.assertFalse(page_cache._cacheable(request, HttpResponse()))
+
+    def test_new_post_purges_pages(self):
+        """Новый пост сбрасывает ленту, группу и профиль автора."""
+        urls = (PageCacheTests.index, PageCacheTests.group_url,
+                PageCacheTests.profile)
+        for url in urls:
+            self.assertCached(url)
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Второй пост', 'group': PageCacheTests.group.pk})
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotEqual(response.get('X-Page-Cache'), 'hit')
+                self.assertContains(response, 'Второй пост')
+
+    def test_comment_purges_detail(self):
+        """Комментарий сбрасывает страницу поста и списки с его счётчиком."""
+        self.assertCached(PageCacheTests.detail)
+        self.assertCached(PageCacheTests.index)
+        self.authorized_client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': PageCacheTests.post.pk}),
+            {'text': 'Отличный комментарий'})
+        self.assertContains(self.guest_client.get(PageCacheTests.detail),
+                            'Отличный комментарий')
+        response = self.guest_client.get(PageCacheTests.index)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_admin_edit_purges(self):
+        """Правка поста и группы в админке сбрасывает их страницы."""
+        self.assertCached(PageCacheTests.detail)
+        self.assertCached(PageCacheTests.group_url)
+        client = Client()
+        client.force_login(PageCacheTests.admin)
+        client.post(
+            reverse('admin:posts_post_change',
+                    args=[PageCacheTests.post.pk]),
+            {'text': 'Исправленный пост', 'author': PageCacheTests.user.pk,
+             'group': PageCacheTests.group.pk})
+        self.assertContains(self.guest_client.get(PageCacheTests.detail),
+                            'Исправленный пост')
+        client.post(
+            reverse('admin:posts_group_change',
+                    args=[PageCacheTests.group.pk]),
+            {'title': 'Новое название', 'slug': 'group',
+             'description': 'Описание'})
+        self.assertContains(self.guest_client.get(PageCacheTests.group_url),
+                            'Новое название')
+
+    def test_group_rename_purges_post_pages(self):
+        """Новое название группы видно на страницах постов без их обхода."""
+        for number in range(5):
+            Post.objects.create(author=PageCacheTests.user,
+                                group=PageCacheTests.group,
+                                text=f'Пост группы {number}')
+        self.assertCached(PageCacheTests.detail)
+        group = PageCacheTests.group
+        group.title = 'Переименованная'
+        with mock.patch.object(fragments, 'bump',
+                               wraps=fragments.bump) as bump:
+            fragments.invalidate_group(group)
+        bump.assert_called_once()
+        self.assertIn(fragments.GROUP_TITLES, bump.call_args[0])
+        Group.objects.filter(pk=group.pk).update(title='Переименованная')
+        self.assertContains(self.guest_client.get(PageCacheTests.detail),
+                            'Переименованная')
+
+    @override_settings(PAGE_CACHE=False)
+    def test_disabled(self):
+        """Без PAGE_CACHE страница не кэшируется."""
+        self.assertCached(PageCacheTests.index, expected=False)
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryBudgetMixin
+
+User = get_user_model()
+AUTHORS = 12
+
+
+class QueryCountTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for number in range(AUTHORS):
+            author = User.objects.create_user(username=f'author{number}')
+            post = Post.objects.create(author=author, group=cls.group,
+                                       text=f'Пост {number}')
+            Follow.objects.create(user=cls.reader, author=author)
+            Comment.objects.create(post=post, author=author,
+                                   text=f'Комментарий {number}')
+        cls.post = post
+        for number in range(AUTHORS):
+            Comment.objects.create(
+                post=cls.post, text='Ещё',
+                author=User.objects.get(username=f'author{number}'))
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryCountTests.reader)
+
+    def test_views_query_budget(self):
+        """Число запросов страниц не растёт с числом постов."""
+        # Сюда входят запросы валидаторов ETag, см. posts/conditional.py.
+        budgets = {
+            reverse('posts:index'): 5,
+            reverse('posts:group_list',
+                    kwargs={'slug': QueryCountTests.group.slug}): 5,
+            reverse('posts:profile',
+                    kwargs={'username': 'author0'}): 7,
+            reverse('posts:post_detail',
+                    kwargs={'post_id': QueryCountTests.post.pk}): 6,
+            reverse('posts:follow_index'): 4,
+        }
+        for url, limit in budgets.items():
+            with self.subTest(url=url):
+                response = self.assertMaxQueries(
+                    limit, self.authorized_client.get, url)
+                self.assertEqual(response.status_code, 200)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.group = Group.objects.create(title='Котоводы', slug='cats')
+        cls.cat = Post.objects.create(author=cls.user, group=cls.group,
+                                      text='Рыжий Кот спит на солнце')
+        cls.dog = Post.objects.create(author=cls.user,
+                                      text='Собака спит в будке')
+
+    def found(self, query):
+        return set(search.search(query))
+
+    def test_tokenize(self):
+        """Слова приводятся к нижнему регистру без повторов."""
+        self.assertEqual(search.tokenize('Кот, кот и КОТЁНОК!'),
+                         ['кот', 'и', 'котёнок'])
+
+    def test_all_words_must_match(self):
+        """Находятся посты, где есть все слова запроса."""
+        self.assertEqual(self.found('спит'),
+                         {SearchTests.cat, SearchTests.dog})
+        self.assertEqual(self.found('кот спит'), {SearchTests.cat})
+        self.assertEqual(self.found('кот будке'), set())
+        self.assertEqual(self.found('  '), set())
+
+    def test_group_title_is_searchable(self):
+        """Пост находится по названию группы и после её переименования."""
+        self.assertEqual(self.found('котоводы'), {SearchTests.cat})
+        group = SearchTests.group
+        group.title = 'Кошатники'
+        group.save()
+        self.assertEqual(self.found('кошатники'), {SearchTests.cat})
+        self.assertEqual(self.found('котоводы'), set())
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста."""
+        post = SearchTests.dog
+        post.text = 'Пёс лает'
+        post.save()
+        self.assertEqual(self.found('собака'), set())
+        self.assertEqual(self.found('пёс'), {post})
+        post.delete()
+        self.assertEqual(self.found('пёс'), set())
+
+    def test_term_table_fallback(self):
+        """Без FTS5 поиск идёт по таблице слов с тем же результатом."""
+        with mock.patch.object(search, 'uses_fts', return_value=False):
+            search.rebuild()
+            self.assertTrue(SearchTerm.objects.filter(term='кот').exists())
+            self.assertEqual(self.found('кот спит'), {SearchTests.cat})
+            self.assertEqual(self.found('котоводы'), {SearchTests.cat})
+            SearchTests.cat.delete()
+            self.assertEqual(self.found('кот'), set())
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты и хранит запрос."""
+        response = Client().get(reverse('posts:search'), {'q': 'кот'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [SearchTests.cat])
+        self.assertEqual(response.context['query'], 'кот')
+        self.assertContains(response, 'Рыжий Кот')
+
+    def test_admin_uses_index(self):
+        """Поиск в админке отдаёт те же посты."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get('/admin/posts/post/', {'q': 'будке'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [SearchTests.dog])
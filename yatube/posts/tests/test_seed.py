@@ -0,0 +1,65 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from .. import counters
+from ..models import Comment, FeedEntry, Follow, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedDataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('seed_data', users=20, groups=3, posts=100,
+                     comments=50, images=5, follows=3, seed=1,
+                     stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_counts(self):
+        """Создано ровно столько строк, сколько запрошено."""
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertEqual(Post.objects.exclude(image='').count(), 5)
+
+    def test_dates_spread(self):
+        """Даты постов разбросаны, а не равны времени вставки."""
+        self.assertGreater(
+            Post.objects.values('pub_date').distinct().count(), 90)
+
+    def test_feeds_and_counters_consistent(self):
+        """Ленты и счётчики сходятся с подписками и постами."""
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+        expected = sum(
+            Post.objects.filter(author_id=follow.author_id).count()
+            for follow in Follow.objects.all())
+        self.assertEqual(FeedEntry.objects.count(), expected)
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_benchmark_reports_json(self):
+        """Замер выдаёт перцентили и число запросов по каждой странице."""
+        out = StringIO()
+        call_command('benchmark_views', requests=3, warmup=0, stdout=out)
+        run, = json.loads(out.getvalue())
+        self.assertEqual(run['dataset']['posts'], 100)
+        self.assertEqual(
+            set(run['views']),
+            {'index', 'group_posts', 'profile', 'post_detail',
+             'follow_index'})
+        for result in run['views'].values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_max'], 0)
+        self.assertGreater(run['peak_rss_kb'], 0)
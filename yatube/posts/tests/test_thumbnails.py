@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.post = Post.objects.create(
+            author=cls.user, text='С картинкой',
+            image=SimpleUploadedFile('thumb.gif', SMALL_GIF, 'image/gif'))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_precomputed_name_matches_sorl(self):
+        """Имя миниатюры вычисляется так же, как в sorl."""
+        built = thumbnails.build(ThumbnailTests.post.image.name)
+        expected = thumbnails.thumbnail_file(ThumbnailTests.post.image)
+        self.assertEqual(built.name, expected.name)
+        self.assertEqual(thumbnails.lookup(ThumbnailTests.post.image).url,
+                         built.url)
+
+    def test_page_uses_original_until_thumbnail_ready(self):
+        """Без миниатюры выводится оригинал, после сборки — миниатюра."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, ThumbnailTests.post.image.url)
+        built = thumbnails.build(ThumbnailTests.post.image.name)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, built.url)
+
+    def test_backfill_command(self):
+        """Команда строит недостающие миниатюры."""
+        self.assertIsNone(thumbnails.lookup(ThumbnailTests.post.image))
+        call_command('build_thumbnails', workers=1, stdout=StringIO())
+        self.assertIsNotNone(thumbnails.lookup(ThumbnailTests.post.image))
+
+    def test_list_prefetches_thumbnails_in_one_lookup(self):
+        """Список постов получает миниатюры одним пакетным запросом."""
+        built = thumbnails.build(ThumbnailTests.post.image.name)
+        posts = [Post.objects.create(author=ThumbnailTests.user,
+                                     text=f'Пост {i}',
+                                     image=ThumbnailTests.post.image.name)
+                 for i in range(3)]
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts)
+        self.assertEqual({post.thumbnail.url for post in posts}, {built.url})
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(all(hasattr(post, 'thumbnail')
+                            for post in response.context['page_obj']))
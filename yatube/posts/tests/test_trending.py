@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import counters, trending
+from ..models import Comment, Follow, Post, TrendingPost
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username='star')
+        cls.author = User.objects.create_user(username='author')
+        for number in range(3):
+            reader = User.objects.create_user(username=f'reader{number}')
+            Follow.objects.create(user=reader, author=cls.star)
+        now = timezone.now()
+        cls.plain = Post.objects.create(author=cls.author, text='Обычный')
+        cls.discussed = Post.objects.create(author=cls.author,
+                                            text='Обсуждаемый')
+        for number in range(4):
+            Comment.objects.create(post=cls.discussed, author=cls.star,
+                                   text=f'Комментарий {number}')
+        cls.reach = Post.objects.create(author=cls.star, text='Охват')
+        cls.old = Post.objects.create(author=cls.star, text='Старый')
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=now - timedelta(days=30),
+            last_activity=now - timedelta(days=30))
+
+    def test_score_decays(self):
+        """Очки растут с комментариями и подписчиками, падают с возрастом."""
+        hour = timedelta(hours=1)
+        self.assertGreater(trending.score(3, 0, hour),
+                           trending.score(0, 0, hour))
+        self.assertGreater(trending.score(0, 10, hour),
+                           trending.score(0, 0, hour))
+        self.assertGreater(trending.score(3, 0, hour),
+                           trending.score(3, 0, hour * 48))
+
+    def test_command_ranks_recent_posts(self):
+        """Рейтинг по очкам, посты вне окна не попадают."""
+        output = StringIO()
+        call_command('rank_trending', stdout=output)
+        self.assertIn('мест: 3', output.getvalue())
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post_id', flat=True)),
+            [TrendingTests.discussed.pk, TrendingTests.reach.pk,
+             TrendingTests.plain.pk])
+
+    def test_size_and_chunks(self):
+        """Размер рейтинга ограничен, чтение пачками не меняет итог."""
+        now = timezone.now()
+        expected = trending.top(size=2, now=now)
+        self.assertEqual([pk for _, pk in expected],
+                         [TrendingTests.discussed.pk, TrendingTests.reach.pk])
+        self.assertEqual(trending.top(size=2, chunk_size=1, now=now),
+                         expected)
+
+    def test_index_trending(self):
+        """Страница популярных — посты рейтинга по местам."""
+        trending.rank()
+        response = self.client.get(reverse('posts:index'),
+                                   {'order': 'trending'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [TrendingTests.discussed, TrendingTests.reach,
+                          TrendingTests.plain])
+        self.assertContains(response, '<b>Популярные</b>', html=True)
+
+    def test_index_trending_reads_places(self):
+        """Страница — диапазон мест, число мест — из счётчика рейтинга."""
+        self.assertEqual(trending.rank(), 3)
+        self.assertEqual(counters.get(counters.TRENDING), 3)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'),
+                                       {'order': 'trending', 'page': 5})
+        page = response.context['page_obj']
+        self.assertEqual(page.number, 1)
+        self.assertEqual(page.paginator.count, 3)
+        sql = [query['sql'] for query in queries]
+        self.assertFalse([query for query in sql if 'COUNT(' in query])
+        self.assertEqual(
+            len([query for query in sql if 'posts_trendingpost' in query]),
+            1)
+        self.assertIn('BETWEEN', next(
+            query for query in sql if 'posts_trendingpost' in query))
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import thumbnails, variants
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png_upload(name='wide.png', size=(800, 400)):
+    content = BytesIO()
+    Image.new('RGB', size, (10, 120, 200)).save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class VariantTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.post = Post.objects.create(author=cls.user, text='Широкая',
+                                       image=png_upload())
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_widths_and_formats(self):
+        """Ширины не больше исходника, форматы — те, что умеет Pillow."""
+        built = variants.build(VariantTests.post.image.name)
+        self.assertEqual({variant['width'] for variant in built}, {320, 640})
+        self.assertEqual(
+            {variant['type'] for variant in built},
+            {mime for _, mime, _, _ in variants.supported_formats()})
+        for variant in built:
+            with default_storage.open(variant['name']) as stored:
+                width, height = Image.open(stored).size
+            self.assertEqual(width, variant['width'])
+            self.assertEqual(height, round(width * variants.RATIO))
+        self.assertEqual(variants.lookup(VariantTests.post.image), built)
+
+    def test_content_hash_names(self):
+        """Одинаковое содержимое даёт те же имена без новых файлов."""
+        first = variants.build(VariantTests.post.image.name)
+        again = variants.build(VariantTests.post.image.name)
+        self.assertEqual(first, again)
+        for variant in first:
+            self.assertTrue(variant['name'].startswith(
+                f'{variants.DIRECTORY}/'))
+            self.assertRegex(variant['name'], r'/[0-9a-f]{20}-\d+w\.\w+$')
+
+    def test_sources_prefer_modern_formats(self):
+        """Современные форматы идут раньше JPEG, ширины — в srcset."""
+        found = [
+            {'type': 'image/jpeg', 'width': 320, 'name': 'variants/a.jpg'},
+            {'type': 'image/webp', 'width': 320, 'name': 'variants/a.webp'},
+            {'type': 'image/webp', 'width': 640, 'name': 'variants/b.webp'},
+        ]
+        self.assertEqual(variants.sources(found), [
+            ('image/webp',
+             '/media/variants/a.webp 320w, /media/variants/b.webp 640w'),
+            ('image/jpeg', '/media/variants/a.jpg 320w'),
+        ])
+
+    def test_page_renders_srcset(self):
+        """Лента выводит srcset, а варианты приходят тем же запросом."""
+        thumbnails.build(VariantTests.post.image.name)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertTrue(post.variants)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, f'sizes="{variants.SIZES}"')
+        for variant in post.variants:
+            self.assertContains(response,
+                                default_storage.url(variant['name']))
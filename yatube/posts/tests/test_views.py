@@ -1,15 +1,18 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..forms import PostForm
-from ..models import Group, Post, Follow
+from ..models import Comment, Group, Post, Follow
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -308,3 +311,103 @@ class PaginatorViewsTest(TestCase):
             response = self.client.get(url)
             self.assertEqual(len(response.context.get('page_obj').object_list),
                              PaginatorViewsTest.amount)
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Курсоры ведут по всем постам без повторов."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        ids = [post.pk for post in list(first) + list(second)]
+        self.assertEqual(len(set(ids)), 20)
+        self.assertIsNone(second.next_cursor)
+        back = self.client.get(
+            url, {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertIsNone(back.previous_cursor)
+
+    def test_last_cursor_page(self):
+        """Курсор последней страницы отдаёт самые старые посты."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        last = self.client.get(
+            url, {'cursor': first.last_cursor}).context['page_obj']
+        self.assertEqual(len(last), PaginatorViewsTest.amount)
+        self.assertIsNone(last.next_cursor)
+        self.assertIsNotNone(last.previous_cursor)
+
+    def test_cursor_page_navigation_without_count(self):
+        """Навигация страницы по курсору не делает COUNT(*)."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}).context['page_obj']
+        list(second)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(first.has_next())
+            self.assertFalse(first.has_previous())
+            self.assertEqual(first.next_page_number(), 2)
+            self.assertFalse(second.has_next())
+            self.assertTrue(second.has_previous())
+            self.assertTrue(second.has_other_pages())
+            self.assertEqual(second.number, second.paginator.num_pages)
+        self.assertEqual(len(queries), 0)
+
+    def test_page_number_depth_capped(self):
+        """Старые ?page=N не листают глубже MAX_PAGES."""
+        with mock.patch('posts.views.MAX_PAGES', 1):
+            page = self.client.get(reverse('posts:index'),
+                                   {'page': 5000}).context['page_obj']
+            self.assertEqual(page.number, 1)
+            self.assertEqual(page.paginator.num_pages, 1)
+            other = User.objects.create_user(username='reader')
+            Follow.objects.create(user=other, author=PaginatorViewsTest.user)
+            self.authorized_client.force_login(other)
+            feed = self.authorized_client.get(
+                reverse('posts:follow_index'), {'page': 5000})
+            self.assertEqual(feed.context['page_obj'].number, 1)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор не ломает страницу."""
+        response = self.client.get(reverse('posts:index'),
+                                   {'cursor': '%%%'})
+        self.assertEqual(len(response.context['page_obj']),
+                         PaginatorViewsTest.amount)
+
+
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(25))
+
+    def test_post_detail_renders_first_page(self):
+        """На странице поста только первая страница комментариев."""
+        cache.clear()
+        response = self.client.get(
+            reverse('posts:post_detail',
+                    kwargs={'post_id': CommentPagesTest.post.pk}))
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 20)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        self.assertContains(response, comments.next_cursor)
+
+    def test_fragment_returns_next_page(self):
+        """Фрагмент отдаёт оставшиеся комментарии."""
+        first = self.client.get(
+            reverse('posts:post_detail',
+                    kwargs={'post_id': CommentPagesTest.post.pk})
+        ).context['comments']
+        response = self.client.get(
+            reverse('posts:post_comments',
+                    kwargs={'post_id': CommentPagesTest.post.pk}),
+            {'cursor': first.next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertEqual([comment.text for comment in
+                          response.context['comments']],
+                         [f'Комментарий {i}' for i in range(20, 25)])
+        self.assertIsNone(response.context['comments'].next_cursor)
@@ -0,0 +1,17 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка верхней границы числа запросов."""
+
+    def assertMaxQueries(self, limit, func, *args, **kwargs):
+        """Вызывает func и проверяет, что запросов не больше limit."""
+        with CaptureQueriesContext(connection) as context:
+            result = func(*args, **kwargs)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), limit,
+            f'Выполнено {len(context)} запросов при лимите {limit}:\n'
+            f'{queries}')
+        return result
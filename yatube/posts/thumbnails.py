@@ -0,0 +1,129 @@
+"""Заранее построенные миниатюры картинок постов."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings as django_settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from . import variants
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+WORKERS = 2
+
+logger = logging.getLogger(__name__)
+_executor = ThreadPoolExecutor(WORKERS, thread_name_prefix='thumbnails')
+
+
+def thumbnail_file(image):
+    """Файл миниатюры без обращения к хранилищу.
+
+    Повторяет подстановку опций из ThumbnailBackend.get_thumbnail,
+    чтобы имя совпало с тем, что построит sorl.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(OPTIONS)
+    if settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, GEOMETRY, options)
+    return ImageFile(name, default.storage)
+
+
+def lookup(image):
+    """Готовая миниатюра из хранилища ключей sorl или None."""
+    if not image:
+        return None
+    return default.kvstore.get(thumbnail_file(image))
+
+
+def _get_raw_many(keys):
+    """Пакетный вариант CachedDBKVStore._get_raw: кэш, затем база."""
+    kvstore = default.kvstore
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        found = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    return {key: value for key, value in values.items()
+            if value != EMPTY_VALUE}
+
+
+def prefetch(posts):
+    """Подтягивает миниатюры и варианты страницы одним запросом.
+
+    Результат кладётся в post.thumbnail и post.variants, шаблону
+    не нужен ввод-вывод.
+    """
+    posts = [post for post in posts if post.image]
+    if not isinstance(default.kvstore, CachedDBKVStore):
+        for post in posts:
+            post.thumbnail = lookup(post.image)
+            post.variants = variants.lookup(post.image)
+        return
+    keys = {post.pk: (add_prefix(thumbnail_file(post.image).key),
+                      variants.key(post.image))
+            for post in posts}
+    values = _get_raw_many(list({key for pair in keys.values()
+                                 for key in pair}))
+    for post in posts:
+        thumbnail_key, variants_key = keys[post.pk]
+        value = values.get(thumbnail_key)
+        post.thumbnail = deserialize_image_file(value) if value else None
+        post.variants = variants.load(values.get(variants_key))
+
+
+def build(name):
+    """Строит миниатюру и варианты картинки, пишет их в хранилище ключей."""
+    thumbnail = get_thumbnail(name, GEOMETRY, **OPTIONS)
+    variants.build(name)
+    return thumbnail
+
+
+def _build_in_worker(name):
+    close_old_connections()
+    try:
+        build(name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру %s', name)
+    finally:
+        close_old_connections()
+
+
+def _build_now(name):
+    try:
+        build(name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру %s', name)
+
+
+def schedule(image):
+    """Ставит построение миниатюры в фоновый пул после коммита.
+
+    При THUMBNAILS_IN_BACKGROUND = False строит сразу, в том же потоке.
+    """
+    if not image:
+        return
+    name = image.name
+    if getattr(django_settings, 'THUMBNAILS_IN_BACKGROUND', True):
+        transaction.on_commit(
+            lambda: _executor.submit(_build_in_worker, name))
+    else:
+        transaction.on_commit(lambda: _build_now(name))
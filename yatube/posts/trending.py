@@ -0,0 +1,84 @@
+"""Рейтинг популярных постов.
+
+Очки поста растут с комментариями и охватом автора (число подписчиков)
+и затухают со временем, как на Hacker News. Считаются только посты с
+активностью за последние WINDOW: старые всё равно затухли, а выборка
+идёт по индексу last_activity. Посты читаются потоком, в памяти живёт
+куча из size лучших и число подписчиков встреченных авторов, поэтому
+миллионы постов не раздувают память. Результат — таблица TrendingPost
+с местами 1..size и счётчик мест: страница рейтинга — один запрос по
+диапазону мест, без COUNT и OFFSET.
+"""
+import heapq
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import counters, fragments
+from .bulk import BATCH_SIZE, batches, bulk_insert
+from .models import Follow, Post, TrendingPost
+
+SIZE = 1000
+WINDOW = timedelta(days=7)
+GRAVITY = 1.5
+REACH_WEIGHT = 1.0
+
+
+def score(comments, followers, age):
+    """Очки поста; age — возраст поста."""
+    points = 1 + comments + REACH_WEIGHT * math.log2(1 + followers)
+    hours = max(age.total_seconds(), 0) / 3600
+    return points / (hours + 2) ** GRAVITY
+
+
+def _followers(author_ids, known):
+    """Дополняет known числом подписчиков новых авторов."""
+    missing = set(author_ids) - known.keys()
+    if not missing:
+        return
+    known.update(dict.fromkeys(missing, 0))
+    known.update(Follow.objects.filter(author_id__in=missing).values_list(
+        'author').annotate(total=Count('pk')).order_by())
+
+
+def top(size=SIZE, window=WINDOW, chunk_size=BATCH_SIZE, now=None):
+    """Лучшие size пар (очки, id поста) по убыванию очков."""
+    now = now or timezone.now()
+    rows = Post.objects.filter(last_activity__gte=now - window).values_list(
+        'pk', 'author_id', 'comment_count', 'pub_date').order_by().iterator(
+        chunk_size=chunk_size)
+    followers = {}
+    best = []
+    for batch in batches(rows, chunk_size):
+        _followers((row[1] for row in batch), followers)
+        for pk, author_id, comments, pub_date in batch:
+            item = (score(comments, followers[author_id], now - pub_date),
+                    pk)
+            if len(best) < size:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+    return sorted(best, reverse=True)
+
+
+def rank(size=SIZE, window=WINDOW, chunk_size=BATCH_SIZE):
+    """Пересобирает таблицу рейтинга, возвращает число мест."""
+    ranking = top(size, window, chunk_size)
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        bulk_insert(TrendingPost, (
+            TrendingPost(rank=place, post_id=pk, score=points)
+            for place, (points, pk) in enumerate(ranking, 1)
+        ), chunk_size)
+        counters.put(counters.TRENDING, len(ranking))
+    fragments.bump('index', 'page:index')
+    return len(ranking)
+
+
+def posts_for_places(first, last):
+    """Посты мест first..last по порядку, по первичному ключу места."""
+    return list(Post.objects.for_display().filter(
+        trending__rank__range=(first, last)).order_by('trending__rank'))
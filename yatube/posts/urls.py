@@ -1,7 +1,7 @@
 # posts/urls.py
 from django.urls import path
 
-from . import views
+from . import api, views
 
 # namespace должен быть объявлен при include и тут, в app_name
 app_name = 'posts'
@@ -10,12 +10,17 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/export/', views.profile_export,
+         name='profile_export'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search_posts, name='search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,3 +32,20 @@ urlpatterns = [
         name='profile_unfollow'
     ),
 ]
+
+API = f'api/{api.API_VERSION}'
+
+urlpatterns += [
+    path(f'{API}/posts/', api.posts, name='api_posts'),
+    path(f'{API}/posts/<int:post_id>/', api.post_detail,
+         name='api_post_detail'),
+    path(f'{API}/posts/<int:post_id>/comments/', api.post_comments,
+         name='api_post_comments'),
+    path(f'{API}/groups/', api.groups, name='api_groups'),
+    path(f'{API}/groups/<slug:slug>/posts/', api.group_posts,
+         name='api_group_posts'),
+    path(f'{API}/profiles/<str:username>/posts/', api.profile_posts,
+         name='api_profile_posts'),
+    path(f'{API}/follow/posts/', api.follow_posts, name='api_follow_posts'),
+    path(f'{API}/follows/', api.follows, name='api_follows'),
+]
@@ -0,0 +1,106 @@
+"""Адаптивные варианты картинок постов: несколько ширин и форматов.
+
+Каждый вариант — кадр с пропорциями миниатюры шириной из WIDTHS,
+закодированный в AVIF и WebP (если их умеет Pillow) и в JPEG для
+остальных браузеров. Имя файла — хэш содержимого, поэтому папку
+DIRECTORY можно отдавать с `Cache-Control: immutable`. Список
+вариантов картинки лежит в хранилище ключей sorl рядом с миниатюрой.
+"""
+import hashlib
+import json
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+WIDTHS = (320, 640, 960)
+RATIO = 339 / 960
+FORMATS = (
+    ('AVIF', 'image/avif', '.avif', {'quality': 50}),
+    ('WEBP', 'image/webp', '.webp', {'quality': 80, 'method': 6}),
+    ('JPEG', 'image/jpeg', '.jpg',
+     {'quality': 80, 'optimize': True, 'progressive': True}),
+)
+DIRECTORY = 'variants'
+IDENTITY = 'variants'
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+def supported_formats():
+    """Форматы из FORMATS, для которых у Pillow есть кодировщик."""
+    Image.init()
+    return [entry for entry in FORMATS if entry[0] in Image.SAVE]
+
+
+def key(image):
+    """Ключ списка вариантов картинки в хранилище ключей sorl."""
+    return add_prefix(ImageFile(image).key, IDENTITY)
+
+
+def lookup(image):
+    """Список вариантов картинки или None, если они ещё не построены."""
+    if not image:
+        return None
+    return load(default.kvstore._get_raw(key(image)))
+
+
+def load(value):
+    return json.loads(value) if value else None
+
+
+def _frames(image):
+    """Кадры под каждую ширину; крупнее исходника не растягиваем."""
+    widths = [width for width in WIDTHS if width <= image.width]
+    for width in widths or WIDTHS[:1]:
+        yield width, ImageOps.fit(image, (width, round(width * RATIO)),
+                                  Image.LANCZOS)
+
+
+def _encode(frame, image_format, options):
+    if image_format == 'JPEG' and frame.mode != 'RGB':
+        frame = frame.convert('RGB')
+    output = BytesIO()
+    frame.save(output, image_format, **options)
+    return output.getvalue()
+
+
+def _save(content, width, extension):
+    digest = hashlib.sha256(content).hexdigest()[:20]
+    name = f'{DIRECTORY}/{digest[:2]}/{digest}-{width}w{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def build(name):
+    """Строит все варианты картинки name и записывает их список."""
+    with default_storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        transparent = ('transparency' in image.info
+                       or image.mode in ('LA', 'PA'))
+        image = image.convert('RGBA' if transparent else 'RGB')
+    variants = [
+        {'type': mime, 'width': width,
+         'name': _save(_encode(frame, image_format, options), width,
+                       extension)}
+        for width, frame in _frames(image)
+        for image_format, mime, extension, options in supported_formats()
+    ]
+    default.kvstore._set_raw(key(ImageFile(name)), json.dumps(variants))
+    return variants
+
+
+def sources(variants):
+    """Пары (тип, srcset) в порядке предпочтения форматов."""
+    by_type = {}
+    for variant in variants or ():
+        by_type.setdefault(variant['type'], []).append(
+            f"{default_storage.url(variant['name'])} {variant['width']}w")
+    return [(mime, ', '.join(by_type[mime]))
+            for _, mime, _, _ in FORMATS if mime in by_type]
@@ -1,46 +1,134 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 
+from core import replicas
+
+from . import (conditional, counters, export, feed, fragments, images,
+               page_cache, search, thumbnails, trending)
 from .models import Group, Post, User, Follow
 from .forms import CommentForm, PostForm
+from .paginator import CursorPaginator
 
 AMOUNT = 10
+# Старые ссылки ?page=N листают не глубже: дальше OFFSET слишком дорог.
+MAX_PAGES = 50
+COMMENTS_AMOUNT = 20
+ACTIVE = 'active'
+TRENDING = 'trending'
+
+
+def paginate(request, queryset, counter=None, **keyset):
+    """Страница постов по курсору, ?page=N оставлен для старых ссылок.
+
+    Старые номера ограничены MAX_PAGES: дальняя страница отдаёт
+    последнюю из доступных, и OFFSET не растёт с размером таблицы.
+    """
+    page_number = request.GET.get('page')
+    if page_number:
+        paginator = Paginator(queryset, AMOUNT)
+        limit = MAX_PAGES * AMOUNT
+        if counter is not None:
+            # Число постов берём из счётчика, а не из COUNT(*).
+            paginator.count = min(counters.get(counter), limit)
+        else:
+            paginator.count = queryset[:limit].count()
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(queryset, AMOUNT, **keyset)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def lazy_page(build):
+    """Страница, которая строится при первом обращении шаблона.
+
+    Если фрагмент {% cache %} нашёлся, запросы страницы не выполняются.
+    """
+    def evaluate():
+        page = build()
+        thumbnails.prefetch(page)
+        return page
+    return SimpleLazyObject(evaluate)
+
 
+def trending_page(request):
+    """Страница рейтинга одним запросом по местам, число мест — счётчик."""
+    paginator = Paginator(Post.objects.none(), AMOUNT)
+    paginator.count = counters.get(counters.TRENDING)
+    try:
+        number = paginator.validate_number(request.GET.get('page'))
+    except PageNotAnInteger:
+        number = 1
+    except EmptyPage:
+        number = paginator.num_pages
+    first = (number - 1) * AMOUNT + 1
+    return Page(trending.posts_for_places(first, first + AMOUNT - 1),
+                number, paginator)
 
+
+def feed_posts(entries):
+    posts = feed.posts_for_entries(entries)
+    thumbnails.prefetch(posts)
+    return posts
+
+
+@replicas.read_only
+@page_cache.for_guests(lambda: 'page:index')
+@conditional.conditional(conditional.index)
 def index(request):
     """Показывает список постов и групп,если есть."""
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('group').all()
-    # Показывать по 10 записей на странице.
-    paginator = Paginator(post_list, AMOUNT)
-    # Из URL извлекаем номер запрошенной страницы.
-    page_number = request.GET.get('page')
-    # Получаем набор записей для страницы с запрошенным номером
-    page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj}
+    order = request.GET.get('order')
+    if order == TRENDING:
+        # Рейтинг готовит rank_trending, страница — срез по месту.
+        page_obj = lazy_page(lambda: trending_page(request))
+    elif order == ACTIVE:
+        # Активные обсуждения: по времени последнего комментария.
+        post_list = Post.objects.for_display().order_by(
+            '-last_activity', '-id')
+        page_obj = lazy_page(lambda: paginate(
+            request, post_list, counters.TOTAL, date_field='last_activity'))
+    else:
+        order = None
+        # Показывать по 10 записей на странице.
+        page_obj = lazy_page(lambda: paginate(
+            request, Post.objects.for_display(), counters.TOTAL))
+    context = {'page_obj': page_obj, 'order': order,
+               **fragments.context('index')}
+    if order:
+        context['page_params'] = urlencode({'order': order}) + '&'
     return render(request, template, context)
 
 
+@replicas.read_only
+@page_cache.for_guests(lambda slug: f'page:group:{slug}')
+@conditional.conditional(conditional.group_posts)
 def group_posts(request, slug):
     """Показывает группу постов по общей тематике."""
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.post.select_related('author').all()
-    paginator = Paginator(post_list, AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {'page_obj': page_obj, 'group': group}
+    post_list = group.post.for_display()
+    page_obj = lazy_page(lambda: paginate(
+        request, post_list, counters.group_key(group.pk)))
+    context = {'page_obj': page_obj, 'group': group,
+               **fragments.context(f'group:{group.pk}')}
     return render(request, template, context)
 
 
+@replicas.read_only
+@page_cache.for_guests(lambda username: f'page:profile:{username}')
+@conditional.conditional(conditional.profile)
 def profile(request, username):
     """Страница пользователя."""
     author = User.objects.get(username=username)
-    posts = author.posts.select_related('author').all()
-    paginator = Paginator(posts, AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = author.posts.for_display()
+    amount = counters.get(counters.author_key(author.pk))
+    page_obj = lazy_page(lambda: paginate(
+        request, posts, counters.author_key(author.pk)))
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user, author=author).exists()
@@ -50,27 +138,66 @@ def profile(request, username):
     context = {
         'author': author,
         'page_obj': page_obj,
-        'amount': posts.count(),
-        'following': following
+        'amount': amount,
+        'following': following,
+        **fragments.context(f'profile:{author.pk}'),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@login_required
+def profile_export(request, username):
+    """Выгрузка данных пользователя потоком: ему самому и персоналу."""
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    chunks, content_type, filename = export.export(
+        author, export_format, media=request.GET.get('media') == '1')
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def paginate_comments(post, cursor=None):
+    """Страница комментариев поста от старых к новым."""
+    paginator = CursorPaginator(post.comments.select_related('author'),
+                                COMMENTS_AMOUNT, date_field='created',
+                                ascending=True)
+    return paginator.get_page(cursor)
+
+
+@replicas.read_only
+@page_cache.for_guests(
+    lambda post_id: (f'page:post:{post_id}', fragments.GROUP_TITLES))
+@conditional.conditional(conditional.post_detail)
 def post_detail(request, post_id):
     """Страница конкретного поста."""
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
-    amount = post.author.posts.count()
+    post = get_object_or_404(Post.objects.for_display(), pk=post_id)
+    thumbnails.prefetch([post])
+    comments = SimpleLazyObject(lambda: paginate_comments(post))
+    amount = counters.get(counters.author_key(post.author_id))
     form = CommentForm()
     context = {
         'form': form,
         'post': post,
         'amount': amount,
-        'comments': comments
+        'comments': comments,
+        **fragments.context(f'post:{post.pk}'),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Следующая страница комментариев фрагментом HTML."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = paginate_comments(post, request.GET.get('cursor'))
+    return render(request, 'posts/includes/comment_list.html',
+                  {'post': post, 'comments': comments})
+
+
 @login_required()
 def post_create(request):
     """Создание поста."""
@@ -78,7 +205,10 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        staged = images.stage(post)
         post.save()
+        fragments.invalidate_post(post)
+        images.enqueue(post, staged)
         return redirect('posts:profile', post.author)
     return render(
         request,
@@ -96,10 +226,17 @@ def post_edit(request, post_id):
     if post.author != request.user:
         return redirect('posts:post_detail', post.pk)
 
+    old_group_id, old_image = post.group_id, post.image.name
     form = PostForm(request.POST or None, files=request.FILES or None,
                     instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        staged = images.stage(post, old_image)
+        # Счётчик комментариев меняют только их сигналы.
+        post.save(update_fields=[*PostForm.Meta.fields, 'image_pending',
+                                 'image_failed'])
+        fragments.invalidate_post(post, old_group_id)
+        images.enqueue(post, staged)
         return redirect('posts:post_detail', post.pk)
     return render(request, 'posts/create_post.html',
                   {'form': form, 'is_edit': is_edit})
@@ -114,28 +251,53 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+        # Число комментариев видно в списках с постом; ленты всех
+        # подписчиков автора не сбрасываем на каждый комментарий.
+        fragments.invalidate_post(post, feeds=False)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 # posts/views.py
 
+@replicas.read_only
 @login_required
 def follow_index(request):
     """Подписки."""
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, AMOUNT)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    context = {'page_obj': page}
+    found = paginate(request, feed.feed_for(request.user),
+                     id_field='post_id')
+    # Шаблон ждёт именно Page: лениво грузятся только сами посты, а
+    # число страниц у CursorPaginator уже известно без COUNT(*).
+    entries = found.object_list
+    page = Page(SimpleLazyObject(lambda: feed_posts(entries)),
+                found.number, found.paginator)
+    for name in ('next_cursor', 'previous_cursor', 'last_cursor'):
+        setattr(page, name, getattr(found, name, None))
+    context = {'page_obj': page,
+               **fragments.context(f'feed:{request.user.pk}')}
     return render(request, 'posts/follow.html', context)
 
 
+def search_posts(request):
+    """Поиск по тексту постов и названиям групп."""
+    query = request.GET.get('q', '').strip()
+    page_obj = paginate(request, search.search(query).for_display())
+    thumbnails.prefetch(page_obj)
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     author = User.objects.get(username=username)
     if request.user != author:
         Follow.objects.get_or_create(user=request.user, author=author)
+        fragments.bump(f'feed:{request.user.pk}')
     return redirect('posts:profile', username=username)
 
 
@@ -144,4 +306,5 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     is_follower = Follow.objects.filter(user=request.user, author=author)
     is_follower.delete()
+    fragments.bump(f'feed:{request.user.pk}')
     return redirect('posts:profile', username=username)
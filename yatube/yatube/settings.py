@@ -46,11 +46,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.InstrumentationMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,9 +88,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами воркера, 0 — закрывать каждый раз.
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
     }
 }
 
+# Профиль SQLite для нескольких воркеров, применяется к каждому новому
+# соединению (core.sqlite). SQLITE_TUNING=0 оставляет умолчания SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+} if os.getenv('SQLITE_TUNING', '1') == '1' else {}
+
+# Реплики только для чтения: REPLICA_DATABASES — пути к файлам SQLite
+# через запятую. Локально их обновляет `manage.py replicate_sqlite`.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+        filter(None, os.getenv('REPLICA_DATABASES', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Сколько секунд после записи клиент читает только с основной базы.
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -143,9 +174,75 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # Изображение
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Миниатюры строятся в фоновом пуле потоков, False — прямо в запросе.
+THUMBNAILS_IN_BACKGROUND = True
+# Картинки ждут в очереди `python manage.py process_images`;
+# IMAGE_JOBS_ASYNC=0 обрабатывает их прямо в запросе — для тестов и
+# разработки без обработчика.
+IMAGE_JOBS_ASYNC = os.getenv('IMAGE_JOBS_ASYNC', '1') == '1'
+
+# Срок жизни фрагментов {% cache %}: их сбрасывают версии, TTL — страховка.
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', 60))
+
+# Кэш целых страниц для гостей, PAGE_CACHE=1 включает.
+PAGE_CACHE = os.getenv('PAGE_CACHE') == '1'
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 60 * 10))
+
+# Замеры запросов: INSTRUMENTATION=1 включает заголовок Server-Timing
+# и сводку по представлениям в лог core.instrumentation.
+INSTRUMENTATION = os.getenv('INSTRUMENTATION') == '1'
+INSTRUMENTATION_INTERVAL = int(os.getenv('INSTRUMENTATION_INTERVAL', 60))
+# Запросы дольше SLOW_QUERY_MS миллисекунд пишутся с планом в SLOW_QUERY_LOG,
+# сводка — `python manage.py slow_queries`. Без переменной журнал выключен.
+SLOW_QUERY_MS = (float(os.getenv('SLOW_QUERY_MS'))
+                 if os.getenv('SLOW_QUERY_MS') else None)
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+        'slow_queries': {
+            'class': 'core.log_handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.instrumentation': {'handlers': ['console'], 'level': 'INFO'},
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Общий кэш для всех процессов: CACHE_URL=redis://127.0.0.1:6379/0
+# Локально сервер поднимается командой `python manage.py runcacheserver`.
+CACHE_URL = os.getenv('CACHE_URL')
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.backend.RedisCache',
+            'LOCATION': CACHE_URL,
+            'OPTIONS': {
+                'MAX_CONNECTIONS': int(os.getenv('CACHE_MAX_CONNECTIONS', 10)),
+                'COMPRESS_MIN_LENGTH': 1024,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}